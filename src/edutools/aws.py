@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import functools
 import io
 import json
 import os
+import random
+import shlex
+import socket
 import sys
 import time
-from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, Optional
 
 import boto3
 import paramiko
+from botocore.config import Config
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
 from botocore.exceptions import ClientError
 from paramiko.ssh_exception import NoValidConnectionsError, SSHException
 
-from edutools.canvas import CanvasLMS
+from edutools.canvas import CanvasLMS, username_from_email
 
 INSTRUCTOR_KEY_FILENAME = "ec2-instructor-access.pem"
 """Name of the instructor PEM file inside the config directory."""
@@ -20,40 +28,130 @@ INSTRUCTOR_KEY_FILENAME = "ec2-instructor-access.pem"
 SSH_USER = "ubuntu"
 """Default SSH user on the AMI (set by the Launch Template)."""
 
+_DESCRIBE_CHUNK = 200
+"""Maximum instance IDs passed to a single DescribeInstances call."""
+
+_TERMINATE_CHUNK = 1000
+"""Maximum instance IDs passed to a single TerminateInstances call."""
+
+_INSTANCE_PAGE_SIZE = 1000
+"""Instances requested per DescribeInstances page when filtering by tag."""
+
+_LIVE_STATES = ["pending", "running", "stopping", "stopped"]
+"""Instance states that still count as existing (not shutting down/terminated)."""
+
+
+def _tag_list(tags: dict[str, str]) -> list[dict[str, str]]:
+    """Convert a ``{key: value}`` mapping to the EC2 ``[{Key, Value}]`` form."""
+    return [{"Key": k, "Value": v} for k, v in tags.items()]
+
+
+def make_tag_specs(tags: dict[str, str]) -> list[dict[str, object]]:
+    """Build a RunInstances ``TagSpecifications`` list for instance tags.
+
+    Callers launching many instances with shared tags can build this once
+    and pass it to :meth:`EC2Provisioner.launch_instance` via ``tag_specs``.
+    """
+    return [{"ResourceType": "instance", "Tags": _tag_list(tags)}]
+
+
+def _tag_value(instance: dict, key: str) -> str:
+    """Return the value of tag *key* on a described instance, or ``""``."""
+    for tag in instance.get("Tags", ()):
+        if tag["Key"] == key:
+            return tag["Value"]
+    return ""
+
 
 def _default_progress(current: int, total: int, message: str) -> None:
     """Default progress callback that prints to stderr."""
     print(f"[{current}/{total}] {message}", file=sys.stderr)
 
 
+def _resolve_region(region_name: Optional[str] = None) -> str:
+    """Return the explicit region, else the AWS env vars, else us-west-2."""
+    return (
+        region_name
+        or os.getenv("AWS_REGION")
+        or os.getenv("AWS_DEFAULT_REGION")
+        or "us-west-2"
+    )
+
+
+# Adaptive retry mode adds client-side rate limiting on top of exponential
+# backoff with jitter, which keeps concurrent launches from cascading into
+# RequestLimitExceeded throttles.
+_EC2_CONFIG = Config(
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    connect_timeout=5,
+    read_timeout=30,
+)
+
+
+@functools.cache
+def _ec2_client(region: str, profile: Optional[str] = None):
+    """Return a shared EC2 client for *region* and AWS *profile*.
+
+    boto3 clients are thread-safe, so one per region and profile is reused
+    rather than re-loading credentials and endpoint data for every
+    provisioner.  Switching ``AWS_PROFILE`` gets a new client, and
+    refreshable credentials (SSO, assumed roles) renew themselves, but
+    static keys edited in place are only picked up by a new process.
+    """
+    return boto3.Session(profile_name=profile, region_name=region).client("ec2", config=_EC2_CONFIG)
+
+
+def _launch_template_spec(launch_template: str) -> dict[str, str]:
+    """Build the RunInstances ``LaunchTemplate`` argument.
+
+    Strings starting with ``lt-`` are treated as template IDs; anything else
+    as a template name.
+    """
+    if launch_template.startswith("lt-"):
+        return {"LaunchTemplateId": launch_template}
+    return {"LaunchTemplateName": launch_template}
+
+
+@functools.lru_cache(maxsize=4)
+def _load_pkey(path: str, mtime: float) -> paramiko.RSAKey:
+    """Parse a PEM private key; *mtime* is part of the cache key only."""
+    return paramiko.RSAKey.from_private_key_file(path)
+
+
+def _load_instructor_key(path: str) -> paramiko.RSAKey:
+    """Return the parsed instructor key, re-reading it only if the file changes."""
+    return _load_pkey(path, os.path.getmtime(path))
+
+
 class EC2Provisioner:
     """Manages EC2 instances for student lab environments."""
 
     def __init__(self, region_name: Optional[str] = None) -> None:
-        region = (
-            region_name
-            or os.getenv("AWS_REGION")
-            or os.getenv("AWS_DEFAULT_REGION")
-            or "us-west-2"
-        )
-        session = boto3.Session(region_name=region)
-        self.ec2 = session.client("ec2")
+        self.ec2 = _ec2_client(_resolve_region(region_name), os.getenv("AWS_PROFILE"))
 
     @staticmethod
     def generate_ssh_key() -> tuple[str, str]:
-        """Generate an RSA-4096 SSH key pair.
+        """Generate an Ed25519 SSH key pair.
+
+        Ed25519 generation is effectively instant, where RSA-4096 spends
+        up to seconds of CPU per student searching for primes.
 
         Returns:
             A (private_key_pem, public_key_openssh) tuple.  The private key
-            is in PEM format; the public key is in OpenSSH ``authorized_keys``
-            format.
+            is in OpenSSH PEM format; the public key is in OpenSSH
+            ``authorized_keys`` format.
         """
-        key = paramiko.RSAKey.generate(4096)
-        buf = io.StringIO()
-        key.write_private_key(buf)
-        private_pem = buf.getvalue()
-        public_openssh = f"ssh-rsa {key.get_base64()} edutools-generated"
-        return private_pem, public_openssh
+        key = ed25519.Ed25519PrivateKey.generate()
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.OpenSSH,
+            serialization.NoEncryption(),
+        ).decode()
+        public_openssh = key.public_key().public_bytes(
+            serialization.Encoding.OpenSSH,
+            serialization.PublicFormat.OpenSSH,
+        ).decode()
+        return private_pem, f"{public_openssh} edutools-generated"
 
     def list_launch_templates(self) -> list[dict[str, str]]:
         """List available EC2 Launch Templates.
@@ -73,9 +171,10 @@ class EC2Provisioner:
         self,
         *,
         launch_template: str,
-        name_tag: str,
+        name_tag: str = "",
         extra_tags: Optional[dict[str, str]] = None,
         user_data: Optional[str] = None,
+        tag_specs: Optional[list[dict[str, object]]] = None,
     ) -> str:
         """Launch a single EC2 instance from a Launch Template.
 
@@ -89,21 +188,17 @@ class EC2Provisioner:
             name_tag: Value for the ``Name`` tag on the instance.
             extra_tags: Additional tags to apply.
             user_data: Cloud-init script for first boot.
+            tag_specs: Prebuilt ``TagSpecifications`` (see
+                :func:`make_tag_specs`); overrides *name_tag*/*extra_tags*.
         """
-        tags: list[dict[str, str]] = [{"Key": "Name", "Value": name_tag}]
-        if extra_tags:
-            tags.extend({"Key": k, "Value": v} for k, v in extra_tags.items())
-
-        if launch_template.startswith("lt-"):
-            lt_spec: dict[str, str] = {"LaunchTemplateId": launch_template}
-        else:
-            lt_spec = {"LaunchTemplateName": launch_template}
+        if tag_specs is None:
+            tag_specs = make_tag_specs({"Name": name_tag, **(extra_tags or {})})
 
         kwargs: dict[str, object] = {
-            "LaunchTemplate": lt_spec,
+            "LaunchTemplate": _launch_template_spec(launch_template),
             "MinCount": 1,
             "MaxCount": 1,
-            "TagSpecifications": [{"ResourceType": "instance", "Tags": tags}],
+            "TagSpecifications": tag_specs,
         }
         if user_data is not None:
             kwargs["UserData"] = user_data
@@ -114,41 +209,80 @@ class EC2Provisioner:
         instance_id: str = resp["Instances"][0]["InstanceId"]
         return instance_id
 
+    def launch_instances(
+        self,
+        *,
+        launch_template: str,
+        count: int,
+        extra_tags: Optional[dict[str, str]] = None,
+    ) -> list[str]:
+        """Launch up to *count* identical instances in a single RunInstances call.
+
+        Only tags common to every instance are applied at launch; use
+        :meth:`tag_instance` afterwards for per-instance tags such as
+        ``Name``.  If EC2 cannot place all *count* instances (capacity or
+        account limits) it launches as many as fit, so the result may be
+        shorter than *count*.
+
+        Returns:
+            The new instance IDs.
+        """
+        kwargs: dict[str, object] = {
+            "LaunchTemplate": _launch_template_spec(launch_template),
+            "MinCount": 1,
+            "MaxCount": count,
+        }
+        if extra_tags:
+            kwargs["TagSpecifications"] = make_tag_specs(extra_tags)
+
+        resp = self.ec2.run_instances(**kwargs)  # pyright: ignore[reportCallIssue]
+        return [inst["InstanceId"] for inst in resp["Instances"]]
+
+    def tag_instance(self, instance_id: str, tags: dict[str, str]) -> None:
+        """Add or overwrite tags on an existing instance."""
+        self.ec2.create_tags(
+            Resources=[instance_id],
+            Tags=_tag_list(tags),
+        )
+
     def find_course_instances(self, course_id: str) -> list[dict[str, str]]:
         """Find all running/pending instances tagged with a course ID.
 
         Returns a list of dicts with: instance_id, student, state, public_ip.
         """
-        resp = self.ec2.describe_instances(
-            Filters=[
+        return [
+            {
+                "instance_id": inst["InstanceId"],
+                "student": _tag_value(inst, "edutools-student"),
+                "state": inst["State"]["Name"],
+                "public_ip": inst.get("PublicIpAddress", ""),
+            }
+            for inst in self.iter_instances(
                 {"Name": "tag:edutools-course", "Values": [course_id]},
-                {"Name": "instance-state-name", "Values": [
-                    "pending", "running", "stopping", "stopped",
-                ]},
-            ],
+                {"Name": "instance-state-name", "Values": _LIVE_STATES},
+            )
+        ]
+
+    def iter_instances(self, *filters: dict[str, object]) -> Iterator[dict]:
+        """Yield every instance matching *filters*, across all result pages."""
+        paginator = self.ec2.get_paginator("describe_instances")
+        pages = paginator.paginate(
+            Filters=list(filters), PaginationConfig={"PageSize": _INSTANCE_PAGE_SIZE},
         )
-        instances: list[dict[str, str]] = []
-        for reservation in resp["Reservations"]:
-            for inst in reservation["Instances"]:
-                tags = {t["Key"]: t["Value"] for t in inst.get("Tags", [])}
-                instances.append({
-                    "instance_id": inst["InstanceId"],
-                    "student": tags.get("edutools-student", ""),
-                    "state": inst["State"]["Name"],
-                    "public_ip": inst.get("PublicIpAddress", ""),
-                })
-        return instances
+        for page in pages:
+            for reservation in page["Reservations"]:
+                yield from reservation["Instances"]
 
     def terminate_instances(
         self, instance_ids: list[str], timeout: int = 300
     ) -> None:
-        """Terminate instances and wait for them to reach the terminated state."""
-        self.ec2.terminate_instances(InstanceIds=instance_ids)
-        waiter = self.ec2.get_waiter("instance_terminated")
-        waiter.wait(
-            InstanceIds=instance_ids,
-            WaiterConfig={"Delay": 15, "MaxAttempts": timeout // 15},
-        )
+        """Terminate instances and wait for them to reach the terminated state.
+
+        IDs are sent in as few TerminateInstances calls as the API allows.
+        """
+        for start in range(0, len(instance_ids), _TERMINATE_CHUNK):
+            self.ec2.terminate_instances(InstanceIds=instance_ids[start:start + _TERMINATE_CHUNK])
+        self._poll_until(instance_ids, "terminated", timeout)
 
     def reboot_instances(
         self, instance_ids: list[str], timeout: int = 300
@@ -158,24 +292,73 @@ class EC2Provisioner:
         Returns a mapping of instance_id -> new public_ip.
         """
         self.ec2.reboot_instances(InstanceIds=instance_ids)
-        waiter = self.ec2.get_waiter("instance_running")
-        waiter.wait(
-            InstanceIds=instance_ids,
-            WaiterConfig={"Delay": 10, "MaxAttempts": timeout // 10},
-        )
-        return self._get_public_ips(instance_ids)
+        return self._poll_until(instance_ids, "running", timeout)
+
+    def _describe(self, instance_ids: list[str]) -> list[dict]:
+        """Describe instances in chunks of at most ``_DESCRIBE_CHUNK`` IDs.
+
+        Freshly launched IDs can briefly be unknown to the API; a chunk that
+        fails with ``InvalidInstanceID.NotFound`` is treated as not yet
+        visible and simply returns nothing this round.
+        """
+        instances: list[dict] = []
+        for start in range(0, len(instance_ids), _DESCRIBE_CHUNK):
+            chunk = instance_ids[start:start + _DESCRIBE_CHUNK]
+            try:
+                desc = self.ec2.describe_instances(InstanceIds=chunk)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "InvalidInstanceID.NotFound":
+                    raise
+                continue
+            for reservation in desc["Reservations"]:
+                instances.extend(reservation["Instances"])
+        return instances
+
+    def _poll_until(self, instance_ids: list[str], state: str, timeout: int) -> dict[str, str]:
+        """Poll until every instance reaches *state*.
 
-    def _get_public_ips(self, instance_ids: list[str]) -> dict[str, str]:
-        """Return a mapping of instance_id -> public_ip for the given instances."""
+        Instances that have arrived are dropped from later polls, so each
+        round only describes the ones still outstanding.  Delays start
+        short and grow geometrically to 15s, with +/-30% jitter so parallel
+        waits don't synchronise their DescribeInstances calls.
+
+        Returns:
+            A mapping of instance_id -> public_ip for arrived instances
+            that have one.
+
+        Raises:
+            RuntimeError: An instance was terminated while waiting for
+                ``running``.
+            TimeoutError: *timeout* seconds elapsed first.
+        """
+        deadline = time.monotonic() + timeout
+        pending = set(instance_ids)
         ip_map: dict[str, str] = {}
-        desc = self.ec2.describe_instances(InstanceIds=instance_ids)
-        for reservation in desc["Reservations"]:
-            for inst in reservation["Instances"]:
+        attempt = 0
+        while True:
+            dead: list[str] = []
+            for inst in self._describe(sorted(pending)):
                 iid: str = inst["InstanceId"]
-                pip: str = inst.get("PublicIpAddress", "")
-                if pip:
-                    ip_map[iid] = pip
-        return ip_map
+                current = inst["State"]["Name"]
+                if current == state:
+                    pending.discard(iid)
+                    pip: str = inst.get("PublicIpAddress", "")
+                    if pip:
+                        ip_map[iid] = pip
+                elif state == "running" and current in ("shutting-down", "terminated"):
+                    dead.append(iid)
+            if dead:
+                raise RuntimeError(f"Instances terminated while starting: {', '.join(dead)}")
+            if not pending:
+                return ip_map
+
+            delay = random.uniform(0.7, 1.3) * min(15.0, 2 * 1.5 ** attempt)
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(
+                    f"Timed out after {timeout}s waiting for instances to be {state}"
+                )
+            time.sleep(delay)
+            attempt += 1
 
     def wait_for_instances(
         self, instance_ids: list[str], timeout: int = 300
@@ -184,21 +367,7 @@ class EC2Provisioner:
 
         Returns a mapping of instance_id -> public_ip.
         """
-        waiter = self.ec2.get_waiter("instance_running")
-        waiter.wait(
-            InstanceIds=instance_ids,
-            WaiterConfig={"Delay": 10, "MaxAttempts": timeout // 10},
-        )
-
-        ip_map: dict[str, str] = {}
-        desc = self.ec2.describe_instances(InstanceIds=instance_ids)
-        for reservation in desc["Reservations"]:
-            for inst in reservation["Instances"]:
-                iid: str = inst["InstanceId"]
-                pip: str = inst.get("PublicIpAddress", "")
-                if pip:
-                    ip_map[iid] = pip
-        return ip_map
+        return self._poll_until(instance_ids, "running", timeout)
 
     @staticmethod
     def configure_student_ssh(
@@ -222,35 +391,10 @@ class EC2Provisioner:
         Returns:
             Empty string on success; an error message on failure.
         """
-        pkey = paramiko.RSAKey.from_private_key_file(instructor_key_path)
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        connected = False
-        deadline = time.monotonic() + ssh_timeout
-        last_error = ""
-
-        while time.monotonic() < deadline:
-            try:
-                ssh.connect(
-                    hostname=hostname,
-                    username=SSH_USER,
-                    pkey=pkey,
-                    timeout=10,
-                    auth_timeout=10,
-                    banner_timeout=10,
-                )
-                connected = True
-                break
-            except (NoValidConnectionsError, SSHException, OSError, TimeoutError) as e:
-                last_error = str(e)
-                remaining = deadline - time.monotonic()
-                if remaining <= 0:
-                    break
-                time.sleep(min(10.0, remaining))
-
-        if not connected:
-            return f"SSH connect failed: {last_error}"
+        pkey = _load_instructor_key(instructor_key_path)
+        ssh, err = _open_ssh(hostname, pkey, timeout=ssh_timeout, retry_delay=10.0)
+        if ssh is None:
+            return f"SSH connect failed: {err}"
 
         cmd = f"echo '{public_key}' >> ~/.ssh/authorized_keys"
 
@@ -268,11 +412,81 @@ class EC2Provisioner:
         return ""
 
 
+def _wait_for_port(host: str, port: int, deadline: float) -> str:
+    """Probe a TCP port until it accepts a connection or *deadline* passes.
+
+    A bare TCP connect is far cheaper than a failed SSH handshake, so this
+    gates :func:`_open_ssh` while an instance is still booting.  At least
+    one probe is always made.
+
+    Returns:
+        Empty string once the port is open; otherwise the last error.
+    """
+    delay = 1.0
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=2):
+                return ""
+        except OSError as e:
+            last_error = str(e) or type(e).__name__
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return last_error
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 1.5, 5.0)
+
+
+def _open_ssh(
+    hostname: str,
+    pkey: paramiko.PKey,
+    *,
+    timeout: float,
+    retry_delay: float,
+) -> tuple[Optional[paramiko.SSHClient], str]:
+    """Connect as ``SSH_USER``, retrying until *timeout* seconds pass.
+
+    Port 22 is probed first so that a booting instance costs cheap TCP
+    probes rather than full handshake attempts.  A *timeout* of 0 makes a
+    single attempt, for hosts already known to be accepting connections.
+
+    Returns:
+        ``(client, "")`` on success, or ``(None, last_error)``.
+    """
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+    deadline = time.monotonic() + timeout
+    while True:
+        err = _wait_for_port(hostname, 22, deadline)
+        if err:
+            ssh.close()
+            return None, err
+        try:
+            ssh.connect(
+                hostname=hostname,
+                username=SSH_USER,
+                pkey=pkey,
+                timeout=10,
+                auth_timeout=10,
+                banner_timeout=10,
+            )
+            return ssh, ""
+        except (NoValidConnectionsError, SSHException, OSError, TimeoutError) as e:
+            last_error = str(e)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                ssh.close()
+                return None, last_error
+            time.sleep(min(retry_delay, remaining))
+
+
 def launch_student_vms(
     course_id: str,
     *,
     launch_template: str,
     instructor_key_path: str,
+    max_ssh_concurrency: int = 8,
+    cloud_init: bool = False,
     progress_callback: Optional[Callable[[int, int, str], None]] = _default_progress,
 ) -> list[dict[str, str]]:
     """Launch EC2 instances for all students in a Canvas course.
@@ -287,26 +501,37 @@ def launch_student_vms(
         launch_template: AWS Launch Template name or ID.
         instructor_key_path: Path to the instructor PEM private key used to
             SSH into instances as the default ``ubuntu`` user.
+        max_ssh_concurrency: Maximum number of instances configured over
+            SSH at the same time.
+        cloud_init: Deliver each student's public key through cloud-init
+            UserData instead of SSHing in after boot.  This skips the SSH
+            pass entirely but replaces any UserData set in the Launch
+            Template, and launches instances one call per student.
         progress_callback: Optional callback for progress updates.
 
     Returns:
         List of dicts with keys: email, username, instance_id, public_ip,
         private_key, public_key, status.
     """
-    canvas = CanvasLMS()
-    ec2 = EC2Provisioner()
+    # The roster decides who gets a VM, so never serve it from disk.
+    canvas = CanvasLMS(disk_cache=False)
 
     if progress_callback:
         progress_callback(0, 0, "Fetching students from Canvas...")
 
-    students = canvas.get_students(course_id)
+    # Page through the roster in the background while the EC2 client is
+    # built (credential resolution, endpoint data) on this thread.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        students_future = pool.submit(canvas.get_students, course_id)
+        ec2 = EC2Provisioner()
+        students = students_future.result()
     total = len(students)
 
     if progress_callback:
         progress_callback(0, total, f"Found {total} students.")
 
     results: list[dict[str, str]] = []
-    pending: list[dict[str, str]] = []
+    eligible: list[tuple[str, str]] = []
 
     for i, student in enumerate(students, 1):
         email = str(student.get("email", ""))
@@ -326,31 +551,104 @@ def launch_student_vms(
                 "status": "skipped",
             })
             continue
+        eligible.append((email, username_from_email(email)))
 
-        username = email.split("@")[0]
+    if not eligible:
+        if progress_callback:
+            progress_callback(total, total, "No instances to configure.")
+        return results
 
+    # Key generation is local CPU work; run it in the background so the
+    # bulk path can overlap it with the RunInstances round trip.
+    if progress_callback:
+        progress_callback(0, len(eligible), "Generating SSH keys...")
+    keygen = ThreadPoolExecutor(max_workers=1)
+    keys_future = keygen.submit(lambda: [EC2Provisioner.generate_ssh_key() for _ in eligible])
+    keygen.shutdown(wait=False)
+
+    pending: list[dict[str, str]] = []
+    if cloud_init:
+        # Every instance's UserData needs its key, so wait for them here.
+        keys = keys_future.result()
+        # Each instance carries its student's key in its own UserData, so
+        # they launch individually (in parallel) with all tags up front.
         if progress_callback:
-            progress_callback(i, total, f"Launching instance for {username}...")
+            progress_callback(0, len(eligible), f"Launching {len(eligible)} instances...")
+
+        def _launch_one(item: tuple[tuple[str, str], tuple[str, str]]) -> tuple[str, str]:
+            """Launch one student's instance; return ``(instance_id, error)``.
 
+            Any failure is caught so one bad call cannot abort the pool and
+            hide the instances already launched for other students.
+            """
+            (_email, username), (_private_key, public_key) = item
+            try:
+                iid = ec2.launch_instance(
+                    launch_template=launch_template,
+                    tag_specs=make_tag_specs({
+                        "Name": f"{username}-vm",
+                        "edutools-course": course_id,
+                        "edutools-student": username,
+                    }),
+                    user_data=build_cloud_init_user_data(public_key),
+                )
+            except ClientError as e:
+                return "", e.response.get("Error", {}).get("Message", str(e))
+            except Exception as e:
+                return "", str(e) or type(e).__name__
+            return iid, ""
+
+        with ThreadPoolExecutor(max_workers=min(32, len(eligible))) as pool:
+            outcomes = pool.map(_launch_one, zip(eligible, keys))
+            for (email, username), (private_key, public_key), (iid, err) in zip(eligible, keys, outcomes):
+                if err:
+                    results.append({
+                        "email": email,
+                        "username": username,
+                        "instance_id": "",
+                        "public_ip": "",
+                        "private_key": "",
+                        "public_key": "",
+                        "status": f"error: {err}",
+                    })
+                else:
+                    pending.append({
+                        "email": email,
+                        "username": username,
+                        "instance_id": iid,
+                        "private_key": private_key,
+                        "public_key": public_key,
+                    })
+        if progress_callback:
+            progress_callback(len(pending), len(eligible), f"Launched {len(pending)} instances.")
+    else:
+        # One RunInstances call for the whole class, tagged with the course so
+        # terminate/find still work even if per-student tagging fails below.
+        if progress_callback:
+            progress_callback(0, len(eligible), f"Launching {len(eligible)} instances...")
         try:
-            private_key, public_key = EC2Provisioner.generate_ssh_key()
-            instance_id = ec2.launch_instance(
+            instance_ids = ec2.launch_instances(
                 launch_template=launch_template,
-                name_tag=f"{username}-vm",
-                extra_tags={
-                    "edutools-course": course_id,
-                    "edutools-student": username,
-                },
+                count=len(eligible),
+                extra_tags={"edutools-course": course_id},
             )
-            pending.append({
-                "email": email,
-                "username": username,
-                "instance_id": instance_id,
-                "private_key": private_key,
-                "public_key": public_key,
-            })
         except ClientError as e:
             msg = e.response.get("Error", {}).get("Message", str(e))
+            for email, username in eligible:
+                results.append({
+                    "email": email,
+                    "username": username,
+                    "instance_id": "",
+                    "public_ip": "",
+                    "private_key": "",
+                    "public_key": "",
+                    "status": f"error: {msg}",
+                })
+            return results
+
+        keys = keys_future.result()
+        # Students past the number EC2 could place get no instance.
+        for email, username in eligible[len(instance_ids):]:
             results.append({
                 "email": email,
                 "username": username,
@@ -358,8 +656,57 @@ def launch_student_vms(
                 "public_ip": "",
                 "private_key": "",
                 "public_key": "",
-                "status": f"error: {msg}",
+                "status": (
+                    f"error: EC2 launched only {len(instance_ids)} of "
+                    f"{len(eligible)} instances"
+                ),
             })
+        launched = [
+            {
+                "email": email,
+                "username": username,
+                "instance_id": iid,
+                "private_key": private_key,
+                "public_key": public_key,
+            }
+            for (email, username), (private_key, public_key), iid
+            in zip(eligible, keys, instance_ids)
+        ]
+
+        def _tag_one(m: dict[str, str]) -> str:
+            """Apply the per-student tags; return an error message or ``""``.
+
+            Any failure is caught so one bad call cannot abort the pool; the
+            untagged instance keeps its course tag and is reported in the
+            student's row by ID.
+            """
+            try:
+                ec2.tag_instance(m["instance_id"], {
+                    "Name": f"{m['username']}-vm",
+                    "edutools-student": m["username"],
+                })
+            except ClientError as e:
+                return e.response.get("Error", {}).get("Message", str(e))
+            except Exception as e:
+                return str(e) or type(e).__name__
+            return ""
+
+        with ThreadPoolExecutor(max_workers=min(32, len(launched))) as pool:
+            for m, err in zip(launched, pool.map(_tag_one, launched)):
+                if err:
+                    results.append({
+                        "email": m["email"],
+                        "username": m["username"],
+                        "instance_id": m["instance_id"],
+                        "public_ip": "",
+                        "private_key": "",
+                        "public_key": "",
+                        "status": f"error: tagging failed: {err}",
+                    })
+                else:
+                    pending.append(m)
+        if progress_callback:
+            progress_callback(len(launched), len(eligible), f"Launched {len(launched)} instances.")
 
     if not pending:
         if progress_callback:
@@ -386,13 +733,12 @@ def launch_student_vms(
             })
         return results
 
-    # SSH into each instance with instructor key to set up the student user
-    for idx, m in enumerate(pending, 1):
+    def _configure_one(m: dict[str, str]) -> dict[str, str]:
+        """SSH in with the instructor key and install the student's key."""
         iid = m["instance_id"]
         public_ip = ip_map.get(iid, "")
-
         if not public_ip:
-            results.append({
+            return {
                 "email": m["email"],
                 "username": m["username"],
                 "instance_id": iid,
@@ -400,23 +746,19 @@ def launch_student_vms(
                 "private_key": "",
                 "public_key": "",
                 "status": "error: no public IP",
-            })
-            continue
+            }
 
-        if progress_callback:
-            progress_callback(
-                idx, len(pending),
-                f"Configuring {m['username']} on {public_ip}...",
+        if cloud_init:
+            # cloud-init installs the key on first boot; nothing to do here.
+            err = ""
+        else:
+            err = EC2Provisioner.configure_student_ssh(
+                instructor_key_path=instructor_key_path,
+                hostname=public_ip,
+                public_key=m["public_key"],
             )
-
-        err = EC2Provisioner.configure_student_ssh(
-            instructor_key_path=instructor_key_path,
-            hostname=public_ip,
-            public_key=m["public_key"],
-        )
-
         if err:
-            results.append({
+            return {
                 "email": m["email"],
                 "username": m["username"],
                 "instance_id": iid,
@@ -424,17 +766,30 @@ def launch_student_vms(
                 "private_key": "",
                 "public_key": "",
                 "status": f"error: {err}",
-            })
-        else:
-            results.append({
-                "email": m["email"],
-                "username": m["username"],
-                "instance_id": iid,
-                "public_ip": public_ip,
-                "private_key": m["private_key"],
-                "public_key": m["public_key"],
-                "status": "launched",
-            })
+            }
+        return {
+            "email": m["email"],
+            "username": m["username"],
+            "instance_id": iid,
+            "public_ip": public_ip,
+            "private_key": m["private_key"],
+            "public_key": m["public_key"],
+            "status": "launched",
+        }
+
+    # SSH into each instance with instructor key to set up the student user.
+    # Handshakes run in parallel, capped so we stay under sshd's default
+    # MaxStartups and don't flood the local network path.
+    configured: list[dict[str, str] | None] = [None] * len(pending)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_ssh_concurrency, len(pending)))) as pool:
+        futures = {pool.submit(_configure_one, m): idx for idx, m in enumerate(pending)}
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            configured[futures[future]] = row
+            if progress_callback:
+                ip = row["public_ip"] or "no IP"
+                progress_callback(done, len(pending), f"Configured {row['username']} on {ip}")
+    results.extend(row for row in configured if row is not None)
 
     if progress_callback:
         progress_callback(len(pending), len(pending), "All instances configured!")
@@ -442,6 +797,11 @@ def launch_student_vms(
     return results
 
 
+def build_cloud_init_user_data(public_key: str) -> str:
+    """Build a cloud-config that authorizes *public_key* for the default user."""
+    return f"#cloud-config\nssh_authorized_keys:\n  - {public_key}\n"
+
+
 def terminate_student_vms(
     course_id: str,
     *,
@@ -582,46 +942,25 @@ def check_ec2_launch(
     if progress_callback:
         progress_callback(4, 5, f"Verifying SSH login with generated key...")
 
-    pkey = paramiko.RSAKey.from_private_key(io.StringIO(private_pem))
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-    connected = False
-    deadline = time.monotonic() + 60
-    last_error = ""
-    while time.monotonic() < deadline:
-        try:
-            ssh.connect(
-                hostname=public_ip,
-                username=SSH_USER,
-                pkey=pkey,
-                timeout=10,
-                auth_timeout=10,
-                banner_timeout=10,
-            )
-            connected = True
-            break
-        except (NoValidConnectionsError, SSHException, OSError, TimeoutError) as e:
-            last_error = str(e)
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                break
-            time.sleep(min(5.0, remaining))
-
-    if not connected:
-        result["status"] = f"error: SSH with generated key failed — {last_error}"
+    # sshd just accepted the instructor login, so a single attempt is
+    # enough here; no need to sit in a connect/sleep retry loop.
+    pkey = paramiko.Ed25519Key.from_private_key(io.StringIO(private_pem))
+    ssh, err = _open_ssh(public_ip, pkey, timeout=0, retry_delay=0)
+    if ssh is None:
+        result["status"] = f"error: SSH with generated key failed — {err}"
         return result
 
-    # Step 5: Run a command to verify
+    # Step 5: Run a command to verify over the same connection
     if progress_callback:
         progress_callback(5, 5, "Running test command over SSH...")
     try:
         _stdin, stdout, _stderr = ssh.exec_command("echo hello-from-edutools && whoami")
         output = stdout.read().decode().strip()
-        ssh.close()
     except SSHException as e:
         result["status"] = f"error: command failed — {e}"
         return result
+    finally:
+        ssh.close()
 
     result["ssh_output"] = output
 
@@ -634,6 +973,7 @@ def check_ec2_launch(
 
 
 def cleanup_check_instances(
+    instances: Optional[list[dict[str, str]]] = None,
     *,
     progress_callback: Optional[Callable[[int, int, str], None]] = _default_progress,
 ) -> list[dict[str, str]]:
@@ -642,6 +982,8 @@ def cleanup_check_instances(
     Finds instances created by :func:`check_ec2_launch` and terminates them.
 
     Args:
+        instances: Check instances already found by the caller (dicts with
+            at least instance_id and state).  Skips the lookup when given.
         progress_callback: Optional callback for progress updates.
 
     Returns:
@@ -649,25 +991,16 @@ def cleanup_check_instances(
     """
     ec2 = EC2Provisioner()
 
-    if progress_callback:
-        progress_callback(0, 0, "Finding check instances...")
-
-    resp = ec2.ec2.describe_instances(
-        Filters=[
-            {"Name": "tag:edutools-check", "Values": ["true"]},
-            {"Name": "instance-state-name", "Values": [
-                "pending", "running", "stopping", "stopped",
-            ]},
-        ],
-    )
-
-    instances: list[dict[str, str]] = []
-    for reservation in resp["Reservations"]:
-        for inst in reservation["Instances"]:
-            instances.append({
-                "instance_id": inst["InstanceId"],
-                "state": inst["State"]["Name"],
-            })
+    if instances is None:
+        if progress_callback:
+            progress_callback(0, 0, "Finding check instances...")
+        instances = [
+            {"instance_id": inst["InstanceId"], "state": inst["State"]["Name"]}
+            for inst in ec2.iter_instances(
+                {"Name": "tag:edutools-check", "Values": ["true"]},
+                {"Name": "instance-state-name", "Values": _LIVE_STATES},
+            )
+        ]
 
     if not instances:
         if progress_callback:
@@ -751,7 +1084,7 @@ def check_ssh_access(
     if progress_callback:
         progress_callback(0, total, f"Checking SSH on {total} instance(s)...")
 
-    pkey = paramiko.RSAKey.from_private_key_file(instructor_key_path)
+    pkey = _load_instructor_key(instructor_key_path)
     results: list[dict[str, str]] = []
     failures: list[dict[str, str]] = []
 
@@ -828,7 +1161,7 @@ HOST="{public_ip}"
 USER="ubuntu"
 SSH_DIR="$HOME/.ssh/"
 AWS_KEY='aws-{username}.pem'
-PRIVATE_KEY='{private_key}'
+PRIVATE_KEY={private_key}
 
 mkdir -p "$SSH_DIR"
 echo "Writing SSH key to $SSH_DIR$AWS_KEY..."
@@ -858,7 +1191,8 @@ def build_ssh_script(
         username=username,
         public_ip=public_ip,
         instance_id=instance_id,
-        private_key=private_key.rstrip("\n"),
+        # shlex.quote keeps the assignment safe whatever the key contains.
+        private_key=shlex.quote(private_key.rstrip("\n")),
     )
 
 
@@ -902,6 +1236,25 @@ def build_connection_doc(*, username: str, public_ip: str, instance_id: str) ->
     )
 
 
+VM_ACCESS_EMAIL_SUBJECT = "Your Virtual Machine Access"
+
+# Plain-text VM access email, filled per student with str.format.
+VM_ACCESS_EMAIL_TEMPLATE = """\
+Hello,
+
+A virtual machine has been set up for you. Your SSH key and
+connection instructions are in the Google Drive folder below:
+
+    https://drive.google.com/drive/folders/{folder_id}
+
+Open the folder and follow the instructions in the
+'Connection Details' document to get started.
+
+Best regards,
+{sender_name}
+"""
+
+
 def reboot_failed_instances(
     log_file: str = "ssh-failures.log",
     *,
@@ -942,7 +1295,7 @@ def reboot_failed_instances(
     new_ip_map = ec2.reboot_instances(instance_ids)
 
     # Verify SSH on each rebooted instance
-    pkey = paramiko.RSAKey.from_private_key_file(instructor_key_path)
+    pkey = _load_instructor_key(instructor_key_path)
     results: list[dict[str, str]] = []
 
     for idx, entry in enumerate(entries, 1):
@@ -964,35 +1317,12 @@ def reboot_failed_instances(
         if progress_callback:
             progress_callback(idx, total, f"Verifying SSH {student or iid} @ {new_ip}...")
 
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         status = "ok"
-
-        connected = False
-        deadline = time.monotonic() + ssh_timeout
-        last_error = ""
-        while time.monotonic() < deadline:
-            try:
-                ssh.connect(
-                    hostname=new_ip,
-                    username=SSH_USER,
-                    pkey=pkey,
-                    timeout=10,
-                    auth_timeout=10,
-                    banner_timeout=10,
-                )
-                connected = True
-                ssh.close()
-                break
-            except (NoValidConnectionsError, SSHException, OSError, TimeoutError) as e:
-                last_error = str(e)
-                remaining = deadline - time.monotonic()
-                if remaining <= 0:
-                    break
-                time.sleep(min(10.0, remaining))
-
-        if not connected:
-            status = f"unreachable: {last_error}"
+        ssh, err = _open_ssh(new_ip, pkey, timeout=ssh_timeout, retry_delay=10.0)
+        if ssh is None:
+            status = f"unreachable: {err}"
+        else:
+            ssh.close()
 
         results.append({
             "instance_id": iid,
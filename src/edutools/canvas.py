@@ -1,16 +1,198 @@
+import functools
+import hashlib
+import json
 import os
+import random
 import re
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
+from typing import Any, Callable, Generator, Iterator
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to requests' own parser
+    orjson = None
 
-# Pattern to extract the "next" URL from the Link header.
-# Canvas returns: <https://...?page=2&per_page=100>; rel="next", ...
-_LINK_NEXT_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+# Maximum number of pages fetched concurrently once the page count is known.
+_PAGE_WORKERS = 8
+
+# Maximum number of distinct endpoints fetched at once by get_many().  Kept
+# small so a batch stays well inside Canvas's per-token rate limit.
+_MANY_WORKERS = 10
+
+# Seconds to wait on a Canvas request before giving up (requests has no
+# default, so a stalled connection would otherwise hang forever).
+_TIMEOUT = 30
+
+# Transient failures (throttling, gateway hiccups) are retried with
+# jittered exponential backoff so concurrent page fetches don't retry in
+# lockstep; a Retry-After header from Canvas takes precedence.
+_RETRY = Retry(
+    total=6,
+    backoff_factor=0.5,
+    backoff_jitter=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+# Canvas meters each token with a leaky bucket and answers 403 "Rate Limit
+# Exceeded" (not 429) once it is drained, which urllib3's Retry cannot see.
+# Calls are capped process-wide, slowed when the advertised budget runs low,
+# and a throttled request is retried with jittered exponential backoff.
+_MAX_CONCURRENT = 10
+_RATE_LIMIT_LOW = 100.0
+_RATE_LIMIT_RETRIES = 5
+_slots = threading.BoundedSemaphore(_MAX_CONCURRENT)
+
+# Shared session so every Canvas call reuses pooled keep-alive connections
+# instead of paying a fresh TCP+TLS handshake per request.  One adapter
+# serves both schemes; pool_maxsize stays well above _PAGE_WORKERS so
+# concurrent page fetches never block waiting for (or discard) a
+# connection, and pool_connections bounds the per-host pools kept around.
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(32, _PAGE_WORKERS), max_retries=_RETRY)
+_session = requests.Session()
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+
+# Default on-disk cache lifetimes (seconds) per kind of Canvas endpoint.
+# Courses change on the scale of months and rosters of days, while
+# submissions move quickly.  Override with CANVAS_CACHE_TTL_<KIND>
+# (e.g. CANVAS_CACHE_TTL_STUDENTS=3600); a TTL of 0 disables caching.
+CACHE_TTLS: dict[str, int] = {
+    "courses": 6 * 3600,
+    "course": 24 * 3600,
+    "assignments": 3600,
+    "assignment": 600,
+    "students": 24 * 3600,
+    "submissions": 300,
+}
+
+_CACHE_KINDS = [
+    (re.compile(r"^/api/v1/courses$"), "courses"),
+    (re.compile(r"^/api/v1/courses/[^/]+$"), "course"),
+    (re.compile(r"/assignments$"), "assignments"),
+    (re.compile(r"/assignments/[^/]+/?$"), "assignment"),
+    (re.compile(r"/users$"), "students"),
+    (re.compile(r"/submissions$"), "submissions"),
+]
+
+
+def cache_dir() -> str:
+    """Return the directory holding cached Canvas responses."""
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "edutools", "canvas")
+
+
+def clear_disk_cache() -> int:
+    """Delete every cached Canvas response; return how many were removed."""
+    removed = 0
+    try:
+        names = os.listdir(cache_dir())
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if name.endswith(".json"):
+            try:
+                os.remove(os.path.join(cache_dir(), name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def _cache_ttl(url_path: str) -> int:
+    """Return the on-disk TTL for *url_path*, or 0 if it is not cached."""
+    for pattern, kind in _CACHE_KINDS:
+        if pattern.search(url_path):
+            override = os.getenv(f"CANVAS_CACHE_TTL_{kind.upper()}", "")
+            return int(override) if override.isdigit() else CACHE_TTLS[kind]
+    return 0
+
+
+class CanvasAPIError(RuntimeError):
+    """A Canvas API request returned a non-success status."""
+
+    def __init__(self, status: int, url: str, body: str) -> None:
+        super().__init__(f"Canvas API error {status}: {body}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+
+def _send(url: str, params: dict[str, str | int], headers: dict[str, str]) -> requests.Response:
+    """GET *url* on the shared session within Canvas's rate limit."""
+    attempt = 0
+    while True:
+        with _slots:
+            response = _session.get(url, params=params, headers=headers, timeout=_TIMEOUT)
+        throttled = response.status_code == 403 and "Rate Limit Exceeded" in response.text
+        if not throttled or attempt == _RATE_LIMIT_RETRIES:
+            break
+        time.sleep(0.5 * 2 ** attempt + random.uniform(0, 0.25))
+        attempt += 1
+
+    try:
+        remaining = float(response.headers.get("X-Rate-Limit-Remaining", ""))
+    except ValueError:
+        return response
+    if remaining < _RATE_LIMIT_LOW:
+        time.sleep(0.5)
+    return response
+
+
+def username_from_email(email: str) -> str:
+    """Return the local part of *email* (everything before the first ``@``)."""
+    return email.partition("@")[0]
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_timestamp(value: str) -> float:
+    """Convert a Canvas ISO-8601 timestamp to POSIX seconds.
+
+    Courses in the same term share an ``end_at`` string, so results are
+    memoized.  A trailing ``Z`` is normalised for older ``fromisoformat``.
+    """
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _json(response: requests.Response) -> Any:
+    """Decode a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _page_urls(last_url: str) -> list[str]:
+    """Build the URLs for pages 2..N from a numbered ``rel="last"`` URL.
+
+    Returns an empty list when the last page is not a plain page number
+    (Canvas uses opaque ``bookmark:`` pages on some endpoints), in which
+    case the caller must fall back to following ``rel="next"``.
+    """
+    parts = urlsplit(last_url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    last_page = dict(query).get("page", "")
+    if not last_page.isdigit():
+        return []
+    urls: list[str] = []
+    for page in range(2, int(last_page) + 1):
+        page_query = [(k, str(page) if k == "page" else v) for k, v in query]
+        urls.append(urlunsplit(parts._replace(query=urlencode(page_query))))
+    return urls
 
 
 class CanvasLMS():
-    def __init__(self):
+    def __init__(self, *, disk_cache: bool = False):
         token = os.getenv("CANVAS_TOKEN")
         if not token:
             raise ValueError(
@@ -18,34 +200,245 @@ class CanvasLMS():
             )
         self.endpoint = os.getenv("CANVAS_ENDPOINT", "https://boisestatecanvas.instructure.com")
         self.headers = {"Authorization": f"Bearer {token}"}
+        # Parsed GET results keyed by (url_path, sorted params), so repeated
+        # lookups of the same course/assignment within a run hit the network once.
+        self._cache: dict[tuple[str, tuple[tuple[str, str | int], ...]], Any] = {}
+        # With disk_cache=True, results also persist across runs under
+        # cache_dir() for the TTLs in CACHE_TTLS, unless CANVAS_NO_CACHE
+        # (--no-cache) is set.  Entries are scoped to the token's hash so a
+        # changed or revoked token never sees another user's data.
+        self._disk_cache = disk_cache and not os.getenv("CANVAS_NO_CACHE")
+        self._token_hash = hashlib.sha256(token.encode()).hexdigest()
+        # Requests currently being fetched, so concurrent callers asking
+        # for the same key share one response (see _coalesce).
+        self._inflight: dict[tuple[str, tuple[tuple[str, str | int], ...]], Future] = {}
+        self._lock = threading.Lock()
+
+    def clear_cache(self) -> None:
+        """Forget all memoized GET results, including those on disk."""
+        self._cache.clear()
+        if self._disk_cache:
+            clear_disk_cache()
+
+    def _disk_path(self, key: tuple[str, tuple[tuple[str, str | int], ...]]) -> str:
+        """Return the cache file for *key*; the endpoint and token hash are
+        part of the hash so different Canvas instances and users never share
+        entries."""
+        raw = json.dumps([self.endpoint, self._token_hash, key[0], key[1]], separators=(",", ":"))
+        return os.path.join(cache_dir(), hashlib.sha1(raw.encode()).hexdigest() + ".json")
+
+    def _read_disk(self, key: tuple[str, tuple[tuple[str, str | int], ...]]) -> tuple[dict[str, Any] | None, bool]:
+        """Load the on-disk entry for *key*.
+
+        Returns ``(entry, fresh)``; an expired entry is still returned so its
+        validators can be used for a conditional request.
+        """
+        ttl = _cache_ttl(key[0])
+        if not self._disk_cache or not ttl:
+            return None, False
+        path = self._disk_path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            with open(path, "rb") as f:
+                data = f.read()
+            entry = orjson.loads(data) if orjson is not None else json.loads(data)
+        except (OSError, ValueError):
+            return None, False
+        if not isinstance(entry, dict) or "body" not in entry:
+            return None, False
+        return entry, age <= ttl
+
+    def _cache_get(self, key: tuple[str, tuple[tuple[str, str | int], ...]]) -> Any:
+        """Return a cached result for *key* from memory or disk, else None."""
+        if key in self._cache:
+            return self._cache[key]
+        entry, fresh = self._read_disk(key)
+        if entry is None or not fresh:
+            return None
+        self._cache[key] = entry["body"]
+        return entry["body"]
+
+    def _cache_put(
+        self,
+        key: tuple[str, tuple[tuple[str, str | int], ...]],
+        result: Any,
+        response: requests.Response | None = None,
+    ) -> None:
+        """Memoize a successful GET result, persisting it when cacheable.
+
+        When *response* is given its ``ETag``/``Last-Modified`` validators are
+        stored too, so an expired entry can be revalidated cheaply.
+        """
+        self._cache[key] = result
+        if not self._disk_cache or not _cache_ttl(key[0]):
+            return
+        entry: dict[str, Any] = {"body": result}
+        if response is not None:
+            entry["etag"] = response.headers.get("ETag")
+            entry["last_modified"] = response.headers.get("Last-Modified")
+        path = self._disk_path(key)
+        try:
+            # Entries hold student names, emails and grades: keep them private.
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            # Write then rename so a concurrent reader never sees half a file.
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            data = orjson.dumps(entry) if orjson is not None else json.dumps(entry).encode()
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # the cache is best-effort; a read-only home is fine
+
+    def _get_page(self, url: str, params: dict[str, str | int]) -> requests.Response:
+        """Fetch one page of a Canvas API listing."""
+        response = _send(url, params, self.headers)
+        if not response.ok:
+            raise CanvasAPIError(response.status_code, url, response.text)
+        return response
+
+    def _iter_pages(self, url_path: str, params: dict[str, str | int]) -> Generator[list[dict[str, object]], None, None]:
+        """Yield each decoded page of a paginated Canvas API endpoint in order.
+
+        When the first response advertises a numbered ``rel="last"`` page,
+        the remaining pages are fetched concurrently; otherwise the
+        ``rel="next"`` chain is followed one page at a time.
+        """
+        response = self._get_page(self.endpoint + url_path, {**params, "per_page": 100})
+        yield _json(response)
+
+        # requests parses the Link header into response.links, keyed by rel.
+        # Canvas only includes rel="last" when the page count is cheap to know.
+        last = response.links.get("last")
+        page_urls = _page_urls(last["url"]) if last else []
+        if page_urls:
+            with ThreadPoolExecutor(max_workers=min(_PAGE_WORKERS, len(page_urls))) as pool:
+                # map() yields in submission order, so pages stay in order.
+                for page in pool.map(lambda u: self._get_page(u, {}), page_urls):
+                    yield _json(page)
+            return
+
+        nxt = response.links.get("next")
+        while nxt:
+            # After the first request, params are baked into the next URL.
+            response = self._get_page(nxt["url"], {})
+            yield _json(response)
+            nxt = response.links.get("next")
+
+    def _iter_paginated(self, url_path: str, params: dict[str, str | int]) -> Iterator[dict[str, object]]:
+        """Yield items from a paginated endpoint as each page arrives.
+
+        A fully consumed listing is memoized like any other GET.
+        """
+        key = (url_path, tuple(sorted(params.items())))
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+        all_results: list[dict[str, object]] = []
+        for page in self._iter_pages(url_path, params):
+            all_results.extend(page)
+            yield from page
+        self._cache_put(key, all_results)
 
     def _get_paginated(self, url_path: str, params: dict[str, str | int]) -> list[dict[str, object]]:
         """Fetch all pages of a paginated Canvas API endpoint."""
-        url: str | None = self.endpoint + url_path
-        params = {**params, "per_page": 100}
-        all_results: list[dict[str, object]] = []
+        key = (url_path, tuple(sorted(params.items())))
+        return list(self._coalesce(key, lambda: list(self._iter_paginated(url_path, params))))
 
-        while url is not None:
-            response = requests.get(url, params=params, headers=self.headers)
-            if not response.ok:
-                raise RuntimeError(f"Canvas API error {response.status_code}: {response.text}")
-            all_results.extend(response.json())
+    def get_many(self, specs: list[tuple[str, dict[str, str | int]]]) -> list[Any]:
+        """Fetch several Canvas endpoints concurrently.
 
-            # After the first request, params are baked into the next URL.
-            params = {}
+        Each spec is a ``(url_path, params)`` pair.  Listing endpoints are
+        fully paginated and returned as lists; single resources come back as
+        dicts.  Results are returned in spec order and share this client's
+        GET cache.
+        """
+        if not specs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(_MANY_WORKERS, len(specs))) as pool:
+            return list(pool.map(lambda spec: self._get_any(*spec), specs))
+
+    def _coalesce(self, key: tuple[str, tuple[tuple[str, str | int], ...]], fetch: Callable[[], Any]) -> Any:
+        """Run *fetch* for *key*, sharing one call among concurrent callers.
+
+        A second thread asking for a key that is already being fetched
+        waits on the first thread's Future instead of sending the same
+        request again.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if owner:
+            try:
+                future.set_result(fetch())
+            except BaseException as exc:
+                future.set_exception(exc)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        return future.result()
+
+    def _get_any(self, url_path: str, params: dict[str, str | int]) -> Any:
+        """Fetch an endpoint that may be a listing or a single resource."""
+        key = (url_path, tuple(sorted(params.items())))
+        result = self._coalesce(key, lambda: self._fetch_any(key, url_path, params))
+        return dict(result) if isinstance(result, dict) else list(result)
 
-            link_header = response.headers.get("Link", "")
-            match = _LINK_NEXT_RE.search(link_header)
-            url = match.group(1) if match else None
+    def _fetch_any(self, key: tuple[str, tuple[tuple[str, str | int], ...]], url_path: str, params: dict[str, str | int]) -> Any:
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
 
+        pages = self._iter_pages(url_path, params)
+        first = next(pages)
+        if isinstance(first, dict):
+            pages.close()
+            self._cache_put(key, first)
+            return first
+        all_results: list[dict[str, object]] = list(first)
+        for page in pages:
+            all_results.extend(page)
+        self._cache_put(key, all_results)
         return all_results
 
     def _get_single(self, url_path: str, params: dict[str, str | int]) -> dict[str, object]:
         """Fetch a single Canvas API resource (no pagination)."""
-        response = requests.get(self.endpoint + url_path, params=params, headers=self.headers)
+        key = (url_path, tuple(sorted(params.items())))
+        return dict(self._coalesce(key, lambda: self._fetch_single(key, url_path, params)))
+
+    def _fetch_single(self, key: tuple[str, tuple[tuple[str, str | int], ...]], url_path: str, params: dict[str, str | int]) -> dict[str, object]:
+        if key in self._cache:
+            return self._cache[key]
+        entry, fresh = self._read_disk(key)
+        if entry is not None and fresh:
+            self._cache[key] = entry["body"]
+            return entry["body"]
+
+        # An expired entry is revalidated with a conditional GET; a 304
+        # means the stored body is still current and nothing is downloaded.
+        headers = dict(self.headers)
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        url = self.endpoint + url_path
+        response = _send(url, params, headers)
+        if response.status_code == 304 and entry is not None:
+            try:
+                os.utime(self._disk_path(key))
+            except OSError:
+                pass
+            self._cache[key] = entry["body"]
+            return entry["body"]
         if not response.ok:
-            raise RuntimeError(f"Canvas API error {response.status_code}: {response.text}")
-        result: dict[str, object] = response.json()
+            raise CanvasAPIError(response.status_code, url, response.text)
+        result: dict[str, object] = _json(response)
+        self._cache_put(key, result, response)
         return result
 
     def get_courses(self, *, include_all: bool = False) -> list[dict[str, object]]:
@@ -59,29 +452,48 @@ class CanvasLMS():
         if include_all:
             return courses
         now = datetime.now(timezone.utc)
-        active: list[dict[str, object]] = []
-        for c in courses:
+        now_ts = now.timestamp()
+        # Canvas normally returns whole-second UTC stamps ("...T06:00:00Z"),
+        # which sort lexically, so those skip datetime parsing entirely.
+        now_iso = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        def is_active(c: dict[str, object]) -> bool:
             if c.get("workflow_state") != "available":
-                continue
+                return False
             term = c.get("term")
             end = term.get("end_at") if isinstance(term, dict) else None
-            if end and datetime.fromisoformat(end) < now:
-                continue
-            active.append(c)
-        return active
+            if not end:
+                return True
+            if len(end) == len(now_iso) and end.endswith("Z"):
+                return end >= now_iso
+            return _parse_timestamp(end) >= now_ts
+
+        return [c for c in courses if is_active(c)]
 
     def get_course(self, course_id: str) -> dict[str, object]:
         """Fetch a single course by ID."""
         return self._get_single(f"/api/v1/courses/{course_id}", {})
 
     def get_assignments(self, course_id: str) -> list[dict[str, object]]:
-        return self._get_paginated(f"/api/v1/courses/{course_id}/assignments", {})
+        return list(self.iter_assignments(course_id))
+
+    def iter_assignments(self, course_id: str) -> Iterator[dict[str, object]]:
+        """Yield a course's assignments as pages arrive."""
+        return self._iter_paginated(f"/api/v1/courses/{course_id}/assignments", {})
 
     def get_students(self, course_id: str) -> list[dict[str, object]]:
-        return self._get_paginated(f"/api/v1/courses/{course_id}/users", {"enrollment_type[]": "student"})
+        return list(self.iter_students(course_id))
+
+    def iter_students(self, course_id: str) -> Iterator[dict[str, object]]:
+        """Yield a course's students as pages arrive."""
+        return self._iter_paginated(f"/api/v1/courses/{course_id}/users", {"enrollment_type[]": "student"})
 
     def get_submissions(self, course_id: str, assignment_id: str) -> list[dict[str, object]]:
-        return self._get_paginated(
+        return list(self.iter_submissions(course_id, assignment_id))
+
+    def iter_submissions(self, course_id: str, assignment_id: str) -> Iterator[dict[str, object]]:
+        """Yield an assignment's submissions as pages arrive."""
+        return self._iter_paginated(
             f"/api/v1/courses/{course_id}/assignments/{assignment_id}/submissions", {}
         )
 
@@ -1,16 +1,33 @@
+import functools
+import hashlib
+import json
 import os
+import re
+import sys
+import time
 import tomllib
 import typer
 import csv
-from typing import Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Optional
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from rich import print as rprint
+
+if TYPE_CHECKING:
+    from rich.progress import Progress
+
+    from edutools.canvas import CanvasLMS
 
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "edutools")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.toml")
+GOOGLE_OAUTH_FILE = os.path.join(CONFIG_DIR, "client_secret.json")
+AWS_CREDS_FILE = os.path.join(os.path.expanduser("~"), ".aws", "credentials")
+
+# Concurrent Drive calls per command; Drive throttles writes per user, so
+# a handful of threads is enough to hide latency without tripping quotas.
+_DRIVE_WORKERS = 8
 
 _DEFAULT_CONFIG = """\
 # Edutools Configuration
@@ -23,6 +40,15 @@ _DEFAULT_CONFIG = """\
 token = ""
 # Canvas instance URL (optional, defaults to https://boisestatecanvas.instructure.com)
 # endpoint = "https://boisestatecanvas.instructure.com"
+#
+# Responses are cached under ~/.cache/edutools/canvas. Override how long
+# (in seconds) each kind of data is reused; 0 disables caching for it.
+# [canvas.cache_ttl]
+# courses = 21600
+# course = 86400
+# assignments = 3600
+# students = 86400
+# submissions = 300
 
 [google]
 # Path to Google OAuth client_secret.json (optional)
@@ -42,6 +68,9 @@ access_key_id = ""
 secret_access_key = ""
 # AWS region (optional, defaults to us-west-2)
 # region = "us-west-2"
+# Launch Template used by 'ec2' commands when --template is omitted
+# (optional, prompted for otherwise; EDUTOOLS_TEMPLATE also works)
+# launch_template = ""
 """
 
 app = typer.Typer(
@@ -53,6 +82,49 @@ app = typer.Typer(
 
 console = Console()
 
+
+@functools.lru_cache(maxsize=1)
+def _canvas() -> "CanvasLMS":
+    """Return the process-wide Canvas client.
+
+    Sharing one client lets a course picked in _select_course (or a roster
+    fetched for one step) be served from its GET cache for the rest of the
+    command instead of being requested again.  It also opts in to the
+    on-disk cache, so read-only listings are fast across runs.
+    """
+    from edutools.canvas import CanvasLMS
+
+    return CanvasLMS(disk_cache=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _live_canvas() -> "CanvasLMS":
+    """Return a process-wide Canvas client that bypasses the disk cache.
+
+    Commands that create or delete IAM users or EC2 instances must act on
+    the current roster, not one saved by an earlier listing command.
+    """
+    from edutools.canvas import CanvasLMS
+
+    return CanvasLMS(disk_cache=False)
+
+
+def _progress() -> "Progress":
+    """Build the progress bar shared by the long-running commands.
+
+    rich.progress is imported here rather than at module level so listing
+    commands and --help don't pay for it.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=console,
+    )
+
 # Sub-apps for organization
 canvas_app = typer.Typer(
     help="📚 Canvas LMS — courses, students, assignments, and submissions",
@@ -84,10 +156,10 @@ app.add_typer(google_app, name="google")
 def _check_config() -> tuple[bool, bool, bool]:
     """Check which services are configured. Returns (canvas, google, aws)."""
     has_canvas = bool(os.getenv("CANVAS_TOKEN"))
-    has_google = os.path.exists(os.path.join(CONFIG_DIR, "client_secret.json"))
+    has_google = os.path.exists(GOOGLE_OAUTH_FILE)
     has_aws = bool(os.getenv("AWS_ACCESS_KEY_ID") and os.getenv("AWS_SECRET_ACCESS_KEY"))
     if not has_aws:
-        has_aws = os.path.exists(os.path.join(os.path.expanduser("~"), ".aws", "credentials"))
+        has_aws = os.path.exists(AWS_CREDS_FILE)
     return has_canvas, has_google, has_aws
 
 
@@ -120,7 +192,7 @@ def _show_setup_status(has_canvas: bool, has_google: bool, has_aws: bool) -> Non
         lines.append("  2. Enable the Google Docs, Drive, and Gmail APIs")
         lines.append("  3. Create OAuth 2.0 credentials (Desktop application)")
         lines.append("  4. Download the client secrets JSON and save as:")
-        lines.append(f"     [cyan]{os.path.join(CONFIG_DIR, 'client_secret.json')}[/cyan]")
+        lines.append(f"     [cyan]{GOOGLE_OAUTH_FILE}[/cyan]")
         lines.append(f"  Or set [yellow]oauth_path[/yellow] in [cyan]{CONFIG_FILE}[/cyan] [google] section")
 
     lines.append("")
@@ -161,6 +233,8 @@ def _load_config() -> dict[str, dict[str, str]]:
         os.environ["CANVAS_TOKEN"] = canvas["token"]
     if canvas.get("endpoint"):
         os.environ["CANVAS_ENDPOINT"] = canvas["endpoint"]
+    for kind, ttl in canvas.get("cache_ttl", {}).items():
+        os.environ[f"CANVAS_CACHE_TTL_{kind.upper()}"] = str(ttl)
 
     # AWS
     aws = config.get("aws", {})
@@ -170,6 +244,8 @@ def _load_config() -> dict[str, dict[str, str]]:
         os.environ["AWS_SECRET_ACCESS_KEY"] = aws["secret_access_key"]
     if aws.get("region"):
         os.environ["AWS_DEFAULT_REGION"] = aws["region"]
+    if aws.get("launch_template"):
+        os.environ["EDUTOOLS_TEMPLATE"] = aws["launch_template"]
 
     # Google
     google = config.get("google", {})
@@ -179,8 +255,21 @@ def _load_config() -> dict[str, dict[str, str]]:
     return config
 
 
+_initialized = False
+
+
 def init():
-    """Initialize environment and ensure config directory exists."""
+    """Initialize environment and ensure config directory exists.
+
+    Runs once per process: the main callback and each command both call
+    this, and re-reading the config (or re-printing the setup panel) on the
+    second call is wasted work.
+    """
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+
     os.makedirs(CONFIG_DIR, exist_ok=True)
 
     # Create default config file with placeholders on first run
@@ -233,7 +322,8 @@ def check_credentials():
         try:
             from edutools.canvas import CanvasLMS
             with console.status("[bold green]Testing Canvas...", spinner="dots"):
-                canvas = CanvasLMS()
+                # A fresh, uncached client so the token is really exercised.
+                canvas = CanvasLMS(disk_cache=False)
                 courses = canvas.get_courses()
             _ok("Canvas LMS", f"{canvas_endpoint} ({len(courses)} courses)")
         except (Exception, SystemExit) as e:
@@ -297,17 +387,40 @@ def check_credentials():
 # Canvas Commands
 # ============================================================================
 
+def _output_option():
+    return typer.Option("table", "--output", "-o", help="Output format: table or csv")
+
+
+def _write_csv(header: list[str], rows) -> None:
+    """Stream *rows* to stdout as CSV, bypassing Rich rendering entirely."""
+    writer = csv.writer(sys.stdout)
+    writer.writerow(header)
+    writer.writerows(rows)
+
+
+def _check_output(output: str) -> None:
+    if output not in ("table", "csv"):
+        console.print(f"[red]Unknown output format: {output} (expected table or csv)[/red]")
+        raise typer.Exit(1)
+
+
 @canvas_app.command("courses")
 def list_courses(
     all_courses: bool = typer.Option(False, "--all", "-a", help="Show all courses, including past/completed ones"),
+    output: str = _output_option(),
 ):
     """List courses where you are a teacher."""
+    _check_output(output)
     init()
-    from edutools.canvas import CanvasLMS
+
+    if output == "csv":
+        courses = _canvas().get_courses(include_all=all_courses)
+        _write_csv(["id", "name"], ((c["id"], c["name"]) for c in courses))
+        return
 
     label = "all" if all_courses else "active"
     with console.status(f"[bold green]Fetching {label} courses from Canvas...", spinner="dots"):
-        canvas = CanvasLMS()
+        canvas = _canvas()
         courses = canvas.get_courses(include_all=all_courses)
 
     if not courses:
@@ -326,89 +439,123 @@ def list_courses(
     console.print(f"\n[dim]Total: {len(courses)} courses[/dim]")
 
 
+@canvas_app.command("clear-cache")
+def clear_canvas_cache():
+    """Delete cached Canvas responses so the next command refetches them."""
+    init()
+    from edutools.canvas import cache_dir, clear_disk_cache
+
+    removed = clear_disk_cache()
+    console.print(f"[green]Removed {removed} cached responses from {cache_dir()}[/green]")
+
+
 @canvas_app.command("assignments")
 def list_assignments(
     course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)"),
+    output: str = _output_option(),
 ):
     """List all assignments for a course."""
+    _check_output(output)
     init()
-    from edutools.canvas import CanvasLMS
 
     if course_id is None:
         course_id = _select_course()
 
-    with console.status(f"[bold green]Fetching assignments for course {course_id}...", spinner="dots"):
-        canvas = CanvasLMS()
-        assignments = canvas.get_assignments(course_id)
-
-    if not assignments:
-        console.print("[yellow]No assignments found.[/yellow]")
+    if output == "csv":
+        assignments = _canvas().iter_assignments(course_id)
+        _write_csv(["id", "name"], ((a["id"], a["name"]) for a in assignments))
         return
 
     table = Table(title=f"📝 Assignments for Course {course_id}", show_header=True, header_style="bold magenta")
     table.add_column("ID", style="cyan", justify="right")
     table.add_column("Assignment Name", style="green")
 
-    for a in assignments:
-        table.add_row(str(a["id"]), a["name"])
+    # Rows are added as each page arrives rather than after the whole
+    # listing has been buffered.
+    with console.status(f"[bold green]Fetching assignments for course {course_id}...", spinner="dots") as status:
+        canvas = _canvas()
+        for a in canvas.iter_assignments(course_id):
+            table.add_row(str(a["id"]), a["name"])
+            status.update(f"[bold green]Fetching assignments for course {course_id}... {table.row_count}")
+
+    if not table.row_count:
+        console.print("[yellow]No assignments found.[/yellow]")
+        return
 
     console.print(table)
-    console.print(f"\n[dim]Total: {len(assignments)} assignments[/dim]")
+    console.print(f"\n[dim]Total: {table.row_count} assignments[/dim]")
 
 
 @canvas_app.command("students")
 def list_students(
     course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)"),
+    output: str = _output_option(),
 ):
     """List all students in a course."""
+    _check_output(output)
     init()
-    from edutools.canvas import CanvasLMS
 
     if course_id is None:
         course_id = _select_course()
 
-    with console.status(f"[bold green]Fetching students for course {course_id}...", spinner="dots"):
-        canvas = CanvasLMS()
-        students = canvas.get_students(course_id)
-
-    if not students:
-        console.print("[yellow]No students found.[/yellow]")
+    if output == "csv":
+        students = _canvas().iter_students(course_id)
+        _write_csv(["id", "email"], ((s["id"], s.get("email", "")) for s in students))
         return
 
     table = Table(title=f"👥 Students in Course {course_id}", show_header=True, header_style="bold magenta")
     table.add_column("ID", style="cyan", justify="right")
     table.add_column("Email", style="green")
 
-    for s in students:
-        table.add_row(str(s["id"]), s.get("email", "[dim]No email[/dim]"))
+    with console.status(f"[bold green]Fetching students for course {course_id}...", spinner="dots") as status:
+        canvas = _canvas()
+        for s in canvas.iter_students(course_id):
+            table.add_row(str(s["id"]), s.get("email", "[dim]No email[/dim]"))
+            status.update(f"[bold green]Fetching students for course {course_id}... {table.row_count}")
+
+    if not table.row_count:
+        console.print("[yellow]No students found.[/yellow]")
+        return
 
     console.print(table)
-    console.print(f"\n[dim]Total: {len(students)} students[/dim]")
+    console.print(f"\n[dim]Total: {table.row_count} students[/dim]")
 
 
 @canvas_app.command("submissions")
 def list_submissions(
     course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)"),
     assignment_id: Optional[str] = typer.Argument(None, help="Assignment ID"),
+    output: str = _output_option(),
 ):
     """List all submissions for an assignment."""
+    _check_output(output)
     init()
-    from edutools.canvas import CanvasLMS
 
     if course_id is None:
         course_id = _select_course()
     if assignment_id is None:
         assignment_id = _select_assignment(course_id)
 
+    if output == "csv":
+        submissions = _canvas().iter_submissions(course_id, assignment_id)
+        _write_csv(["user_id", "grade"], ((sub["user_id"], sub.get("grade") or "") for sub in submissions))
+        return
+
     with console.status(f"[bold green]Fetching submissions...", spinner="dots"):
-        canvas = CanvasLMS()
-        submissions = canvas.get_submissions(course_id, assignment_id)
+        canvas = _canvas()
+        # The assignment (for its name) and its submissions are independent
+        # requests, so fetch them together.
+        assignment, submissions = canvas.get_many([
+            (f"/api/v1/courses/{course_id}/assignments/{assignment_id}/", {}),
+            (f"/api/v1/courses/{course_id}/assignments/{assignment_id}/submissions", {}),
+        ])
 
     if not submissions:
         console.print("[yellow]No submissions found.[/yellow]")
         return
 
-    table = Table(title=f"📊 Submissions for Assignment {assignment_id}", show_header=True, header_style="bold magenta")
+    title = assignment.get("name") or f"Assignment {assignment_id}"
+    table = Table(title=f"📊 Submissions for {title}", show_header=True, header_style="bold magenta")
     table.add_column("User ID", style="cyan", justify="right")
     table.add_column("Grade", style="green")
 
@@ -424,7 +571,7 @@ def list_submissions(
 # IAM Commands
 # ============================================================================
 
-def _rich_progress_callback(progress: Progress, task_id):
+def _rich_progress_callback(progress: "Progress", task_id):
     """Create a progress callback for Rich progress bar."""
     def callback(current: int, total: int, message: str):
         if total > 0:
@@ -436,10 +583,8 @@ def _rich_progress_callback(progress: Progress, task_id):
 
 def _select_course() -> str:
     """Fetch Canvas courses and prompt the user to select one."""
-    from edutools.canvas import CanvasLMS
-
     with console.status("[bold green]Fetching courses from Canvas...", spinner="dots"):
-        canvas = CanvasLMS()
+        canvas = _canvas()
         courses = canvas.get_courses()
 
     if not courses:
@@ -447,8 +592,9 @@ def _select_course() -> str:
         raise typer.Exit()
 
     console.print()
-    for i, c in enumerate(courses, 1):
-        console.print(f"  [cyan]{i}[/cyan]. {c['name']} [dim](ID: {c['id']})[/dim]")
+    console.print("\n".join(
+        f"  [cyan]{i}[/cyan]. {c['name']} [dim](ID: {c['id']})[/dim]" for i, c in enumerate(courses, 1)
+    ))
     console.print()
 
     choice = typer.prompt("Select a course", type=int)
@@ -461,10 +607,8 @@ def _select_course() -> str:
 
 def _select_assignment(course_id: str) -> str:
     """Fetch assignments for a course and prompt the user to select one."""
-    from edutools.canvas import CanvasLMS
-
     with console.status("[bold green]Fetching assignments from Canvas...", spinner="dots"):
-        canvas = CanvasLMS()
+        canvas = _canvas()
         assignments = canvas.get_assignments(course_id)
 
     if not assignments:
@@ -472,8 +616,9 @@ def _select_assignment(course_id: str) -> str:
         raise typer.Exit()
 
     console.print()
-    for i, a in enumerate(assignments, 1):
-        console.print(f"  [cyan]{i}[/cyan]. {a['name']} [dim](ID: {a['id']})[/dim]")
+    console.print("\n".join(
+        f"  [cyan]{i}[/cyan]. {a['name']} [dim](ID: {a['id']})[/dim]" for i, a in enumerate(assignments, 1)
+    ))
     console.print()
 
     choice = typer.prompt("Select an assignment", type=int)
@@ -484,8 +629,34 @@ def _select_assignment(course_id: str) -> str:
     return str(assignments[choice - 1]["id"])
 
 
+# Picks are numbers separated by commas and/or whitespace.
+_SELECTION_RE = re.compile(r"[\d\s,]+")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def _parse_selection(choices: str, items: list) -> list:
+    """Resolve a comma-separated list of 1-based picks (0 = all) into items."""
+    nums = []
+    if _SELECTION_RE.fullmatch(choices):
+        nums = [int(n) for n in _NUMBER_RE.findall(choices)]
+    if not nums:
+        console.print(f"[red]Invalid selection: {choices}[/red]")
+        raise typer.Exit(1)
+
+    if 0 in nums:
+        return items
+    bad = [n for n in nums if n < 1 or n > len(items)]
+    if bad:
+        console.print(f"[red]Invalid selection: {bad[0]}[/red]")
+        raise typer.Exit(1)
+    return [items[n - 1] for n in nums]
+
+
 @iam_app.command("provision", rich_help_panel="Workflow")
-def provision_users(course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)")):
+def provision_users(
+    course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)"),
+    max_workers: int = typer.Option(10, "--max-workers", "-w", help="Maximum concurrent IAM operations"),
+):
     """Create IAM users for all students in a course."""
     init()
     from edutools.iam import provision_students
@@ -500,30 +671,25 @@ def provision_users(course_id: Optional[str] = typer.Argument(None, help="Canvas
         title="☁️ AWS IAM",
     ))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("[cyan]Starting...", total=None)
-        results = provision_students(course_id, progress_callback=_rich_progress_callback(progress, task))
+    with _progress() as progress:
+        task = progress.add_task("[cyan]Fetching students from Canvas...", total=None)
+        students = _live_canvas().get_students(course_id)
+        results = provision_students(
+            course_id, progress_callback=_rich_progress_callback(progress, task),
+            max_workers=max_workers, students=students,
+        )
 
     _display_iam_results(results, "created", "🚀 Provisioning Results", show_password=True)
 
     if results:
         filename = f"provisioned_{course_id}.csv"
         with open(filename, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=["email", "username", "password", "status"])
-            writer.writeheader()
-            for r in results:
-                writer.writerow({
-                    "email": r.get("email", ""),
-                    "username": r.get("username", ""),
-                    "password": r.get("password", ""),
-                    "status": r.get("status", ""),
-                })
+            writer = csv.writer(f)
+            writer.writerow(["email", "username", "password", "status"])
+            writer.writerows(
+                (r.get("email", ""), r.get("username", ""), r.get("password", ""), r.get("status", ""))
+                for r in results
+            )
         console.print(f"\n[green]Results written to [bold]{filename}[/bold][/green]")
 
 
@@ -536,17 +702,30 @@ def email_credentials(
 ):
     """Email IAM credentials to students from a CSV."""
     init()
-    import os
-    from edutools.iam import IAMProvisioner
-    from edutools.google_helpers import send_email
+    from edutools.iam import CREDENTIALS_EMAIL_SUBJECT, CREDENTIALS_EMAIL_TEMPLATE, IAMProvisioner
+    from edutools.google_helpers import _get_gmail_credentials, send_email
 
     if not os.path.exists(csv_file):
         console.print(f"[red]File not found: {csv_file}[/red]")
         raise typer.Exit(1)
 
+    # Positional reads avoid building a dict for every row; only the
+    # rows that will actually be emailed become dicts.
+    fields = ("email", "username", "password", "status")
     with open(csv_file, newline="") as f:
-        reader = csv.DictReader(f)
-        rows = [r for r in reader if r.get("status") == "created" and r.get("email")]
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [name for name in fields if name not in header]
+        if missing:
+            console.print(f"[red]CSV is missing column(s): {', '.join(missing)}[/red]")
+            raise typer.Exit(1)
+        email_col, user_col, pass_col, status_col = (header.index(name) for name in fields)
+        width = max(email_col, user_col, pass_col, status_col) + 1
+        rows = [
+            {"email": r[email_col], "username": r[user_col], "password": r[pass_col], "status": r[status_col]}
+            for r in reader
+            if len(r) >= width and r[status_col] == "created" and r[email_col]
+        ]
 
     if not rows:
         console.print("[yellow]No successfully created users found in CSV.[/yellow]")
@@ -559,22 +738,13 @@ def email_credentials(
     else:
         console.print()
         console.print(f"  [cyan]0[/cyan]. All students")
-        for i, row in enumerate(rows, 1):
-            console.print(f"  [cyan]{i}[/cyan]. {row['email']} [dim]({row['username']})[/dim]")
+        console.print("\n".join(
+            f"  [cyan]{i}[/cyan]. {row['email']} [dim]({row['username']})[/dim]" for i, row in enumerate(rows, 1)
+        ))
         console.print()
 
         choices = typer.prompt("Select students (comma-separated numbers, or 0 for all)")
-        nums = [int(n.strip()) for n in choices.split(",")]
-
-        if 0 in nums:
-            selected = rows
-        else:
-            selected = []
-            for n in nums:
-                if n < 1 or n > len(rows):
-                    console.print(f"[red]Invalid selection: {n}[/red]")
-                    raise typer.Exit(1)
-                selected.append(rows[n - 1])
+        selected = _parse_selection(choices, rows)
 
     iam = IAMProvisioner()
     sign_in_url = iam.get_sign_in_url()
@@ -598,46 +768,42 @@ def email_credentials(
             title="📧 Gmail",
         ))
 
-    results = []
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("[cyan]Sending emails...", total=len(selected))
-        for i, row in enumerate(selected, 1):
-            recipient = test_email if test_email else row["email"]
-            username = row["username"]
-            password = row["password"]
-
-            progress.update(task, completed=i, description=f"[cyan]Emailing {recipient}")
-
-            subject = "Your AWS Account Credentials"
-            body_text = (
-                f"Hello,\n\n"
-                f"Your AWS IAM account has been created. Here are your login credentials:\n\n"
-                f"Sign-in URL: {sign_in_url}\n"
-                f"Username: {username}\n"
-                f"Temporary Password: {password}\n\n"
-                f"IMPORTANT: You will be required to change your password on first login.\n\n"
-                f"Your account has permissions to use EC2 (virtual machines) in the us-west-2 region only.\n\n"
-                f"Best regards,\n{sender_name}\n"
-            )
+    def _send_one(recipient: str, username: str, password: str) -> dict:
+        body_text = CREDENTIALS_EMAIL_TEMPLATE.format(
+            sign_in_url=sign_in_url, username=username, password=password, sender_name=sender_name,
+        )
+        return send_email(to=recipient, subject=CREDENTIALS_EMAIL_SUBJECT, body_text=body_text)
+
+    # Authenticate once up front so the worker threads don't each start
+    # an OAuth flow.
+    try:
+        _get_gmail_credentials()
+    except Exception as e:
+        console.print(f"[red]Gmail authentication failed: {e}[/red]")
+        raise typer.Exit(1)
 
-            email_sent = False
+    # Each send is a Gmail API round trip, so they go out in parallel;
+    # results keep the selection order for the summary.
+    results = [{"email": test_email or row["email"], "sent": False} for row in selected]
+    with _progress() as progress, ThreadPoolExecutor(max_workers=min(16, len(selected))) as pool:
+        task = progress.add_task("[cyan]Sending emails...", total=len(selected))
+        futures = {
+            pool.submit(_send_one, entry["email"], row["username"], row["password"]): entry
+            for entry, row in zip(results, selected)
+        }
+        for future in as_completed(futures):
+            entry = futures[future]
+            recipient = entry["email"]
+            progress.update(task, advance=1, description=f"[cyan]Emailed {recipient}")
             try:
-                result = send_email(to=recipient, subject=subject, body_text=body_text)
-                email_sent = result.get("success", False)
-                if not email_sent:
+                result = future.result()
+                entry["sent"] = result.get("success", False)
+                if not entry["sent"]:
                     console.print(f"[red]Failed to email {recipient}: {result.get('error', 'unknown error')}[/red]")
             except Exception as e:
                 console.print(f"[red]Failed to email {recipient}: {e}[/red]")
 
-            results.append({"email": recipient, "sent": email_sent})
-
-    sent_count = sum(1 for r in results if r["sent"])
+    sent_count = sum(r["sent"] for r in results)
     console.print()
     console.print(Panel.fit(
         f"[bold]Total:[/bold] {len(results)} | "
@@ -651,6 +817,7 @@ def email_credentials(
 def deprovision_users(
     course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)"),
     confirm: bool = typer.Option(False, "--yes", "-y", help="Skip confirmation prompt"),
+    max_workers: int = typer.Option(10, "--max-workers", "-w", help="Maximum concurrent IAM operations"),
 ):
     """Remove IAM users for all students in a course."""
     init()
@@ -672,21 +839,22 @@ def deprovision_users(
         title="☁️ AWS IAM",
     ))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("[cyan]Starting...", total=None)
-        results = deprovision_students(course_id, progress_callback=_rich_progress_callback(progress, task))
+    with _progress() as progress:
+        task = progress.add_task("[cyan]Fetching students from Canvas...", total=None)
+        students = _live_canvas().get_students(course_id)
+        results = deprovision_students(
+            course_id, progress_callback=_rich_progress_callback(progress, task),
+            max_workers=max_workers, students=students,
+        )
 
     _display_iam_results(results, "deleted", "🗑️ Deprovisioning Results")
 
 
 @iam_app.command("reset-passwords", no_args_is_help=True, rich_help_panel="Management")
-def reset_passwords(course_id: str = typer.Argument(..., help="Canvas course ID")):
+def reset_passwords(
+    course_id: str = typer.Argument(..., help="Canvas course ID"),
+    max_workers: int = typer.Option(10, "--max-workers", "-w", help="Maximum concurrent IAM operations"),
+):
     """Reset passwords for all students in a course."""
     init()
     from edutools.iam import reset_student_passwords
@@ -697,15 +865,13 @@ def reset_passwords(course_id: str = typer.Argument(..., help="Canvas course ID"
         title="☁️ AWS IAM",
     ))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("[cyan]Starting...", total=None)
-        results = reset_student_passwords(course_id, progress_callback=_rich_progress_callback(progress, task))
+    with _progress() as progress:
+        task = progress.add_task("[cyan]Fetching students from Canvas...", total=None)
+        students = _live_canvas().get_students(course_id)
+        results = reset_student_passwords(
+            course_id, progress_callback=_rich_progress_callback(progress, task),
+            max_workers=max_workers, students=students,
+        )
 
     _display_iam_results(results, "reset", "🔑 Password Reset Results", show_password=True)
 
@@ -734,7 +900,10 @@ def reset_password(username: str = typer.Argument(..., help="IAM username to res
 
 
 @iam_app.command("update-policy", rich_help_panel="Management")
-def update_policy(course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)")):
+def update_policy(
+    course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)"),
+    max_workers: int = typer.Option(10, "--max-workers", "-w", help="Maximum concurrent IAM operations"),
+):
     """Update EC2 policy for all students in a course."""
     init()
     from edutools.iam import update_student_policies
@@ -749,15 +918,13 @@ def update_policy(course_id: Optional[str] = typer.Argument(None, help="Canvas c
         title="☁️ AWS IAM",
     ))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("[cyan]Starting...", total=None)
-        results = update_student_policies(course_id, progress_callback=_rich_progress_callback(progress, task))
+    with _progress() as progress:
+        task = progress.add_task("[cyan]Fetching students from Canvas...", total=None)
+        students = _live_canvas().get_students(course_id)
+        results = update_student_policies(
+            course_id, progress_callback=_rich_progress_callback(progress, task),
+            max_workers=max_workers, students=students,
+        )
 
     _display_iam_results(results, "updated", "📜 Policy Update Results")
 
@@ -797,9 +964,10 @@ def _display_iam_results(results: list, success_status: str, title: str, show_pa
     console.print(table)
 
     # Summary
-    success_count = sum(1 for r in results if r["status"] == success_status)
-    skipped_count = sum(1 for r in results if r["status"] == "skipped")
-    error_count = sum(1 for r in results if r["status"] == "error")
+    counts = Counter(r["status"] for r in results)
+    success_count = counts[success_status]
+    skipped_count = counts["skipped"]
+    error_count = counts["error"]
 
     console.print()
     console.print(Panel.fit(
@@ -816,21 +984,81 @@ def _display_iam_results(results: list, success_status: str, title: str, show_pa
 # EC2 Commands
 # ============================================================================
 
-def _select_launch_template() -> str:
-    """Fetch AWS Launch Templates and prompt the user to select one."""
+# Launch templates rarely change, so the list is reused for an hour.
+_TEMPLATE_CACHE_TTL = 3600
+
+
+def _launch_templates_cache_path() -> str:
+    """Return the template cache file for the current AWS identity and region.
+
+    The identity is a hash of the resolved access key id (else the profile
+    name), read locally so a cache hit needs no AWS round trip and switching
+    credentials never shows another account's templates.
+    """
+    import boto3
+
+    from edutools.aws import _resolve_region
+
+    region = _resolve_region()
+    identity = os.getenv("AWS_PROFILE", "default")
+    creds = boto3.Session().get_credentials()
+    if creds is not None and creds.access_key:
+        identity = hashlib.sha256(creds.access_key.encode()).hexdigest()[:16]
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "edutools", f"launch_templates-{identity}-{region}.json")
+
+
+def _list_launch_templates() -> list[dict[str, str]]:
+    """Return the account's launch templates, cached on disk for an hour.
+
+    ``--no-cache`` (``EDUTOOLS_NO_CACHE``) skips the cached copy and
+    refreshes it.
+    """
+    path = _launch_templates_cache_path()
+    try:
+        if (
+            not os.getenv("EDUTOOLS_NO_CACHE")
+            and time.time() - os.path.getmtime(path) < _TEMPLATE_CACHE_TTL
+        ):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+
     from edutools.aws import EC2Provisioner
 
+    templates = EC2Provisioner().list_launch_templates()
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(templates, f)
+    except OSError:
+        pass
+    return templates
+
+
+def _select_launch_template() -> str:
+    """Pick an AWS Launch Template.
+
+    Uses ``EDUTOOLS_TEMPLATE`` (or ``[aws] launch_template`` in the config)
+    when set; otherwise lists the templates and prompts the user.
+    """
+    template = os.getenv("EDUTOOLS_TEMPLATE")
+    if template:
+        return template
+
     with console.status("[bold green]Fetching launch templates...", spinner="dots"):
-        ec2 = EC2Provisioner()
-        templates = ec2.list_launch_templates()
+        templates = _list_launch_templates()
 
     if not templates:
         console.print("[red]No launch templates found in your AWS account.[/red]")
         raise typer.Exit(1)
 
     console.print()
-    for i, t in enumerate(templates, 1):
-        console.print(f"  [cyan]{i}[/cyan]. {t['name']} [dim]({t['id']})[/dim]")
+    console.print("\n".join(
+        f"  [cyan]{i}[/cyan]. {t['name']} [dim]({t['id']})[/dim]" for i, t in enumerate(templates, 1)
+    ))
     console.print()
 
     choice = typer.prompt("Select a launch template", type=int)
@@ -845,6 +1073,10 @@ def _select_launch_template() -> str:
 def launch_vms(
     course_id: Optional[str] = typer.Argument(None, help="Canvas course ID (prompted if omitted)"),
     launch_template: Optional[str] = typer.Option(None, "--template", "-l", help="AWS Launch Template name or ID (prompted if omitted)"),
+    cloud_init: bool = typer.Option(
+        False, "--cloud-init",
+        help="Install student keys via cloud-init UserData instead of SSH (overrides template UserData)",
+    ),
 ):
     """Launch EC2 instances for all students in a course.
 
@@ -853,19 +1085,9 @@ def launch_vms(
     Drive folder named after the course.
     """
     init()
-    import json
-    from edutools.aws import SSH_SCRIPT_FILENAME, launch_student_vms, build_connection_doc, build_ssh_script
-    from edutools.canvas import CanvasLMS
-    import edutools.google_helpers as google_helpers
-
-    if course_id is None:
-        course_id = _select_course()
-
-    if launch_template is None:
-        launch_template = _select_launch_template()
-
-    from edutools.aws import INSTRUCTOR_KEY_FILENAME
+    from edutools.aws import INSTRUCTOR_KEY_FILENAME, launch_student_vms
 
+    # Check the local key before any prompt or Canvas/AWS round trip.
     instructor_key = os.path.join(CONFIG_DIR, INSTRUCTOR_KEY_FILENAME)
     if not os.path.exists(instructor_key):
         console.print(
@@ -874,7 +1096,13 @@ def launch_vms(
         )
         raise typer.Exit(1)
 
-    canvas = CanvasLMS()
+    if course_id is None:
+        course_id = _select_course()
+
+    if launch_template is None:
+        launch_template = _select_launch_template()
+
+    canvas = _canvas()
     course_info = canvas.get_course(course_id)
     course_name = str(course_info["name"])
 
@@ -888,18 +1116,13 @@ def launch_vms(
         title="🖥️ AWS EC2",
     ))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Starting...", total=None)
         results = launch_student_vms(
             course_id,
             launch_template=launch_template,
             instructor_key_path=instructor_key,
+            cloud_init=cloud_init,
             progress_callback=_rich_progress_callback(progress, task),
         )
 
@@ -907,6 +1130,22 @@ def launch_vms(
         console.print("[yellow]No students found in course.[/yellow]")
         return
 
+    _show_launch_results(results)
+
+    launched = [r for r in results if r["status"] == "launched" and r.get("username")]
+    if not launched:
+        console.print("[yellow]No instances launched — skipping Drive upload.[/yellow]")
+    else:
+        failures = _upload_launch_to_drive(course_name, launched)
+        for username, err in failures.items():
+            console.print(f"[red]Drive upload failed for {username}: {err}[/red]")
+        console.print(f"\n[green]Keys uploaded to Google Drive folder: [bold]{course_name}[/bold][/green]")
+
+    _show_launch_summary(results)
+
+
+def _show_launch_results(results: list[dict[str, str]]) -> None:
+    """Print the per-student table for ``ec2 launch``."""
     table = Table(title="🖥️ EC2 Launch Results", show_header=True, header_style="bold magenta")
     table.add_column("Email", style="cyan")
     table.add_column("Username", style="green")
@@ -914,96 +1153,124 @@ def launch_vms(
     table.add_column("Public IP", style="yellow")
     table.add_column("Status", justify="center")
 
+    status_displays = {
+        "launched": "[green]✓ launched[/green]",
+        "skipped": "[yellow]⊘ skipped[/yellow]",
+    }
     for r in results:
         status = r["status"]
-        if status == "launched":
-            status_display = "[green]✓ launched[/green]"
-        elif status == "skipped":
-            status_display = "[yellow]⊘ skipped[/yellow]"
-        else:
-            status_display = f"[red]✗ {status}[/red]"
-
         table.add_row(
             r.get("email", "N/A"),
             r.get("username") or "[dim]N/A[/dim]",
             r.get("instance_id") or "[dim]N/A[/dim]",
             r.get("public_ip") or "[dim]N/A[/dim]",
-            status_display,
+            status_displays.get(status) or f"[red]✗ {status}[/red]",
         )
 
     console.print(table)
 
-    # Upload manifest and per-student keys to Google Drive
-    launched = [r for r in results if r["status"] == "launched" and r.get("username")]
 
-    if not launched:
-        console.print("[yellow]No instances launched — skipping Drive upload.[/yellow]")
-    else:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console,
-        ) as progress:
-            total = len(launched) + 2  # folder + manifest + per-student
-            task = progress.add_task("[cyan]Uploading to Google Drive...", total=total)
-
-            # Create top-level course folder
-            progress.update(task, completed=1, description=f"[cyan]Creating Drive folder '{course_name}'...")
-            course_folder_id = google_helpers.create_folder(course_name)
-
-            # Upload manifest.json
-            progress.update(task, completed=2, description="[cyan]Uploading manifest.json...")
-            manifest_entries = [
-                {
-                    "email": r["email"],
-                    "username": r["username"],
-                    "instance_id": r["instance_id"],
-                    "public_ip": r["public_ip"],
-                    "status": r["status"],
-                }
-                for r in launched
-            ]
-            google_helpers.upload_text_file(
-                "manifest.json",
-                json.dumps(manifest_entries, indent=2),
-                course_folder_id,
+def _upload_launch_to_drive(course_name: str, launched: list[dict[str, str]]) -> dict[str, str]:
+    """Upload the manifest and each student's key and connection doc to Drive.
+
+    Creates a folder named after the course holding ``manifest.json`` and
+    one ``VM Access - <username>`` subfolder per launched student.  A failed
+    subfolder or upload is reported for that student without stopping the
+    rest.
+
+    Returns:
+        Mapping of username -> error message for students whose uploads
+        failed; empty when every upload succeeded.
+    """
+    from edutools.aws import SSH_SCRIPT_FILENAME, build_connection_doc, build_ssh_script
+    import edutools.google_helpers as google_helpers
+
+    with _progress() as progress:
+        total = len(launched) + 2  # folder + manifest + per-student
+        task = progress.add_task("[cyan]Uploading to Google Drive...", total=total)
+
+        # Create top-level course folder
+        progress.update(task, completed=1, description=f"[cyan]Creating Drive folder '{course_name}'...")
+        course_folder_id = google_helpers.create_folder(course_name)
+
+        # Upload manifest.json
+        progress.update(task, completed=2, description="[cyan]Uploading manifest.json...")
+        manifest_entries = [
+            {
+                "email": r["email"],
+                "username": r["username"],
+                "instance_id": r["instance_id"],
+                "public_ip": r["public_ip"],
+                "status": r["status"],
+            }
+            for r in launched
+        ]
+        google_helpers.upload_text_file(
+            "manifest.json",
+            json.dumps(manifest_entries, indent=2),
+            course_folder_id,
+        )
+
+        # Create every per-student subfolder in one batched request
+        progress.update(task, description="[cyan]Creating student folders...")
+        folders = google_helpers.create_folders(
+            [f"VM Access - {r['username']}" for r in launched],
+            parent_id=course_folder_id,
+        )
+        failures: dict[str, str] = {}
+        ready: list[tuple[dict[str, str], str]] = []
+        for r, (student_folder_id, err) in zip(launched, folders):
+            if err:
+                failures[r["username"]] = f"folder creation failed: {err}"
+                progress.update(task, advance=1)
+            else:
+                ready.append((r, student_folder_id))
+
+        def _upload_one_student(r: dict, student_folder_id: str) -> None:
+            username = r["username"]
+            script = build_ssh_script(
+                username=username,
+                public_ip=r["public_ip"],
+                instance_id=r["instance_id"],
+                private_key=r["private_key"],
+            )
+            google_helpers.upload_text_file(SSH_SCRIPT_FILENAME, script, student_folder_id)
+            doc_text = build_connection_doc(
+                username=username,
+                public_ip=r["public_ip"],
+                instance_id=r["instance_id"],
+            )
+            google_helpers.create_doc_with_content(
+                f"Connection Details - {username}", doc_text, folder_id=student_folder_id,
             )
 
-            # Create per-student subfolders with keys and connection docs
-            for i, r in enumerate(launched, 1):
-                username = r["username"]
+        # Fill each subfolder with keys and connection docs.  Every
+        # student's uploads are independent Drive round trips, so they
+        # go out in parallel.
+        with ThreadPoolExecutor(max_workers=max(1, min(_DRIVE_WORKERS, len(ready)))) as pool:
+            futures = {
+                pool.submit(_upload_one_student, r, student_folder_id): r["username"]
+                for r, student_folder_id in ready
+            }
+            for future in as_completed(futures):
+                username = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    failures[username] = str(e)
                 progress.update(
-                    task,
-                    completed=2 + i,
-                    description=f"[cyan]Uploading keys for {username}...",
-                )
-                student_folder_id = google_helpers.create_folder(
-                    f"VM Access - {username}", parent_id=course_folder_id,
-                )
-                script = build_ssh_script(
-                    username=username,
-                    public_ip=r["public_ip"],
-                    instance_id=r["instance_id"],
-                    private_key=r["private_key"],
-                )
-                google_helpers.upload_text_file(SSH_SCRIPT_FILENAME, script, student_folder_id)
-                doc_text = build_connection_doc(
-                    username=username,
-                    public_ip=r["public_ip"],
-                    instance_id=r["instance_id"],
-                )
-                google_helpers.create_doc_with_content(
-                    f"Connection Details - {username}", doc_text, folder_id=student_folder_id,
+                    task, advance=1, description=f"[cyan]Uploaded keys for {username}",
                 )
 
-        console.print(f"\n[green]Keys uploaded to Google Drive folder: [bold]{course_name}[/bold][/green]")
+    return failures
 
-    # Summary
-    launched_count = sum(1 for r in results if r["status"] == "launched")
-    skipped = sum(1 for r in results if r["status"] == "skipped")
-    errors = sum(1 for r in results if r["status"] not in ("launched", "skipped"))
+
+def _show_launch_summary(results: list[dict[str, str]]) -> None:
+    """Print the status totals for ``ec2 launch``."""
+    counts = Counter(r["status"] for r in results)
+    launched_count = counts["launched"]
+    skipped = counts["skipped"]
+    errors = len(results) - launched_count - skipped
 
     console.print()
     console.print(Panel.fit(
@@ -1050,13 +1317,7 @@ def ec2_check_launch(
         title="🖥️ AWS EC2",
     ))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Starting...", total=5)
         result = check_ec2_launch(
             launch_template=launch_template,
@@ -1104,23 +1365,19 @@ def ec2_check_cleanup(
     from edutools.aws import EC2Provisioner, cleanup_check_instances
 
     ec2 = EC2Provisioner()
-    resp = ec2.ec2.describe_instances(
-        Filters=[
+    preview: list[dict[str, str]] = [
+        {
+            "instance_id": inst["InstanceId"],
+            "state": inst["State"]["Name"],
+            "public_ip": inst.get("PublicIpAddress", ""),
+        }
+        for inst in ec2.iter_instances(
             {"Name": "tag:edutools-check", "Values": ["true"]},
             {"Name": "instance-state-name", "Values": [
                 "pending", "running", "stopping", "stopped",
             ]},
-        ],
-    )
-
-    preview: list[dict[str, str]] = []
-    for reservation in resp["Reservations"]:
-        for inst in reservation["Instances"]:
-            preview.append({
-                "instance_id": inst["InstanceId"],
-                "state": inst["State"]["Name"],
-                "public_ip": inst.get("PublicIpAddress", ""),
-            })
+        )
+    ]
 
     if not preview:
         console.print("[yellow]No check instances found.[/yellow]")
@@ -1147,15 +1404,10 @@ def ec2_check_cleanup(
             console.print("[yellow]Aborted.[/yellow]")
             raise typer.Exit()
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Terminating...", total=None)
         results = cleanup_check_instances(
+            preview,
             progress_callback=_rich_progress_callback(progress, task),
         )
 
@@ -1196,13 +1448,7 @@ def ec2_check_ssh(
         )
         raise typer.Exit(1)
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Checking SSH...", total=None)
         results = check_ssh_access(
             course_id,
@@ -1256,7 +1502,6 @@ def ec2_reboot_failed(
     notify students of the updated details.
     """
     init()
-    import json
     from edutools.aws import (
         INSTRUCTOR_KEY_FILENAME,
         SSH_SCRIPT_FILENAME,
@@ -1264,7 +1509,6 @@ def ec2_reboot_failed(
         reboot_failed_instances,
     )
     import edutools.google_helpers as google_helpers
-    from edutools.canvas import CanvasLMS
 
     instructor_key_path = os.path.join(CONFIG_DIR, INSTRUCTOR_KEY_FILENAME)
     if not os.path.isfile(instructor_key_path):
@@ -1297,13 +1541,7 @@ def ec2_reboot_failed(
     console.print()
 
     # Step 1: Reboot and verify SSH
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Rebooting...", total=None)
         results = reboot_failed_instances(
             log_file,
@@ -1348,7 +1586,7 @@ def ec2_reboot_failed(
         console.print("[yellow]No course_id in log — skipping Google Drive updates.[/yellow]")
         return
 
-    canvas = CanvasLMS()
+    canvas = _canvas()
     course_info = canvas.get_course(course_id)
     course_name = str(course_info["name"])
 
@@ -1376,13 +1614,7 @@ def ec2_reboot_failed(
 
     ip_updates = {r["student"]: r["new_ip"] for r in rebooted}
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Updating Google Drive...", total=len(rebooted))
 
         for idx, r in enumerate(rebooted, 1):
@@ -1460,8 +1692,13 @@ def ec2_check_email():
     Use [cyan]google check-cleanup[/cyan] to remove the test folder afterwards.
     """
     init()
-    import json
-    from edutools.aws import SSH_SCRIPT_FILENAME, build_connection_doc, build_ssh_script
+    from edutools.aws import (
+        SSH_SCRIPT_FILENAME,
+        VM_ACCESS_EMAIL_SUBJECT,
+        VM_ACCESS_EMAIL_TEMPLATE,
+        build_connection_doc,
+        build_ssh_script,
+    )
     import edutools.google_helpers as google_helpers
     from edutools.google_helpers import send_email
 
@@ -1488,13 +1725,7 @@ def ec2_check_email():
     status = "error"
     error_detail = ""
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Starting...", total=total_steps)
 
         try:
@@ -1514,7 +1745,7 @@ def ec2_check_email():
                     "status": "launched",
                 }
             ]
-            google_helpers.upload_text_file(
+            manifest_id = google_helpers.upload_text_file(
                 "manifest.json", json.dumps(manifest, indent=2), course_folder_id,
             )
             steps_passed += 1
@@ -1530,13 +1761,13 @@ def ec2_check_email():
                 instance_id=test_instance_id,
                 private_key="--- DUMMY TEST KEY ---",
             )
-            google_helpers.upload_text_file(SSH_SCRIPT_FILENAME, script, subfolder_id)
+            script_id = google_helpers.upload_text_file(SSH_SCRIPT_FILENAME, script, subfolder_id)
             doc_text = build_connection_doc(
                 username=test_username,
                 public_ip=test_ip,
                 instance_id=test_instance_id,
             )
-            google_helpers.create_doc_with_content(
+            doc_id = google_helpers.create_doc_with_content(
                 f"Connection Details - {test_username}", doc_text, folder_id=subfolder_id,
             )
             steps_passed += 1
@@ -1548,41 +1779,29 @@ def ec2_check_email():
 
             # Step 5: Send email with link (like ec2 email-credentials)
             progress.update(task, completed=5, description=f"[cyan]Sending email to {test_email}...")
-            folder_link = f"https://drive.google.com/drive/folders/{subfolder_id}"
-            subject = "Your Virtual Machine Access"
-            body_text = (
-                f"Hello,\n\n"
-                f"A virtual machine has been set up for you. Your SSH key and\n"
-                f"connection instructions are in the Google Drive folder below:\n\n"
-                f"    {folder_link}\n\n"
-                f"Open the folder and follow the instructions in the\n"
-                f"'Connection Details' document to get started.\n\n"
-                f"Best regards,\nCourse Instructor\n"
+            body_text = VM_ACCESS_EMAIL_TEMPLATE.format(
+                folder_id=subfolder_id, sender_name="Course Instructor",
             )
-            result = send_email(to=test_email, subject=subject, body_text=body_text)
+            result = send_email(to=test_email, subject=VM_ACCESS_EMAIL_SUBJECT, body_text=body_text)
             if not result.get("success"):
                 raise RuntimeError(result.get("error", "unknown email error"))
             steps_passed += 1
 
             # Step 6: Verify folder structure
             progress.update(task, completed=6, description="[cyan]Verifying folder structure...")
-            course_contents = google_helpers.list_folder_contents(course_folder_id)
-            has_manifest = any(f["name"] == "manifest.json" for f in course_contents)
-            has_subfolder = any(
-                f["name"] == f"VM Access - {test_username}" for f in course_contents
-            )
-            if not has_manifest or not has_subfolder:
-                missing = []
-                if not has_manifest:
-                    missing.append("manifest.json")
-                if not has_subfolder:
-                    missing.append(f"VM Access - {test_username}")
-                raise RuntimeError(f"Missing in course folder: {', '.join(missing)}")
-            sub_contents = google_helpers.list_folder_contents(subfolder_id)
-            if len(sub_contents) < 2:
-                raise RuntimeError(
-                    f"Expected at least 2 items in student subfolder, found {len(sub_contents)}"
-                )
+            # Every create call above returned the new file's ID, so only
+            # the parent link needs confirming with Drive.
+            created = {
+                "manifest.json": manifest_id,
+                f"VM Access - {test_username}": subfolder_id,
+                SSH_SCRIPT_FILENAME: script_id,
+                f"Connection Details - {test_username}": doc_id,
+            }
+            missing = [name for name, file_id in created.items() if not file_id]
+            if missing:
+                raise RuntimeError(f"Drive returned no ID for: {', '.join(missing)}")
+            if course_folder_id not in google_helpers.get_parents(manifest_id):
+                raise RuntimeError("manifest.json is not inside the course folder")
             steps_passed += 1
 
             status = "passed"
@@ -1629,14 +1848,12 @@ def share_keys(
     shares each student's subfolder with them.
     """
     init()
-    import json
-    from edutools.canvas import CanvasLMS
     import edutools.google_helpers as google_helpers
 
     if course_id is None:
         course_id = _select_course()
 
-    canvas = CanvasLMS()
+    canvas = _canvas()
     course_info = canvas.get_course(course_id)
     course_name = str(course_info["name"])
 
@@ -1652,13 +1869,12 @@ def share_keys(
     folder_id = folders[0]["id"]
 
     # Find and download manifest
-    contents = google_helpers.list_folder_contents(folder_id)
-    manifest_files = [f for f in contents if f["name"] == "manifest.json"]
-    if not manifest_files:
+    manifest_file = google_helpers.find_child(folder_id, "manifest.json")
+    if not manifest_file:
         console.print(f"[red]manifest.json not found in Drive folder '{course_name}'.[/red]")
         raise typer.Exit(1)
 
-    manifest_json = google_helpers.download_text_file(manifest_files[0]["id"])
+    manifest_json = google_helpers.download_text_file(manifest_file["id"])
     entries: list[dict[str, str]] = json.loads(manifest_json)
 
     if not entries:
@@ -1668,8 +1884,9 @@ def share_keys(
     # Build a map of student subfolder names to IDs
     student_folders = {
         f["name"]: f["id"]
-        for f in contents
-        if f["mimeType"] == "application/vnd.google-apps.folder"
+        for f in google_helpers.list_folder_contents(
+            folder_id, mime_type="application/vnd.google-apps.folder",
+        )
     }
 
     console.print(Panel.fit(
@@ -1679,33 +1896,24 @@ def share_keys(
         title="📁 Google Drive",
     ))
 
-    results: list[dict[str, str]] = []
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("[cyan]Sharing keys...", total=len(entries))
-
-        for i, entry in enumerate(entries, 1):
-            username = entry["username"]
-            email = entry["email"]
-
-            progress.update(task, completed=i, description=f"[cyan]Sharing with {email}")
-
-            subfolder_name = f"VM Access - {username}"
-            subfolder_id = student_folders.get(subfolder_name)
-            if not subfolder_id:
-                results.append({"email": email, "status": "error: subfolder not found"})
-                continue
+    results = [{"email": entry["email"], "status": "error: subfolder not found"} for entry in entries]
+    to_share = []
+    for entry, result in zip(entries, results):
+        subfolder_id = student_folders.get(f"VM Access - {entry['username']}")
+        if subfolder_id:
+            to_share.append((result, subfolder_id))
 
-            try:
-                google_helpers.share_with_user(subfolder_id, email)
-                results.append({"email": email, "status": "shared"})
-            except Exception as e:
-                results.append({"email": email, "status": f"error: {e}"})
+    # Permission grants carry no media, so they go out through Drive's
+    # batch endpoint; results keep the manifest order.
+    with console.status("[bold green]Sharing keys...", spinner="dots"):
+        try:
+            errors = google_helpers.share_with_users(
+                [(subfolder_id, result["email"]) for result, subfolder_id in to_share],
+            )
+        except Exception as e:
+            errors = [str(e)] * len(to_share)
+    for (result, _), error in zip(to_share, errors):
+        result["status"] = f"error: {error}" if error else "shared"
 
     # Results table
     table = Table(title="📁 Share Results", show_header=True, header_style="bold magenta")
@@ -1748,15 +1956,14 @@ def ec2_email_credentials(
     Run [cyan]ec2 share-keys[/cyan] first so students have access.
     """
     init()
-    import json
-    from edutools.canvas import CanvasLMS
+    from edutools.aws import VM_ACCESS_EMAIL_SUBJECT, VM_ACCESS_EMAIL_TEMPLATE
     import edutools.google_helpers as google_helpers
-    from edutools.google_helpers import send_email
+    from edutools.google_helpers import _get_gmail_credentials, send_email
 
     if course_id is None:
         course_id = _select_course()
 
-    canvas = CanvasLMS()
+    canvas = _canvas()
     course_info = canvas.get_course(course_id)
     course_name = str(course_info["name"])
 
@@ -1772,13 +1979,12 @@ def ec2_email_credentials(
     folder_id = folders[0]["id"]
 
     # Find and download manifest
-    contents = google_helpers.list_folder_contents(folder_id)
-    manifest_files = [f for f in contents if f["name"] == "manifest.json"]
-    if not manifest_files:
+    manifest_file = google_helpers.find_child(folder_id, "manifest.json")
+    if not manifest_file:
         console.print(f"[red]manifest.json not found in Drive folder '{course_name}'.[/red]")
         raise typer.Exit(1)
 
-    manifest_json = google_helpers.download_text_file(manifest_files[0]["id"])
+    manifest_json = google_helpers.download_text_file(manifest_file["id"])
     entries: list[dict[str, str]] = json.loads(manifest_json)
 
     if not entries:
@@ -1788,8 +1994,9 @@ def ec2_email_credentials(
     # Build a map of student subfolder names to IDs
     student_folders = {
         f["name"]: f["id"]
-        for f in contents
-        if f["mimeType"] == "application/vnd.google-apps.folder"
+        for f in google_helpers.list_folder_contents(
+            folder_id, mime_type="application/vnd.google-apps.folder",
+        )
     }
 
     if test_email:
@@ -1799,24 +2006,14 @@ def ec2_email_credentials(
     else:
         console.print()
         console.print("  [cyan]0[/cyan]. All students")
-        for i, entry in enumerate(entries, 1):
-            console.print(
-                f"  [cyan]{i}[/cyan]. {entry['email']} [dim]({entry['username']})[/dim]"
-            )
+        console.print("\n".join(
+            f"  [cyan]{i}[/cyan]. {entry['email']} [dim]({entry['username']})[/dim]"
+            for i, entry in enumerate(entries, 1)
+        ))
         console.print()
 
         choices = typer.prompt("Select students (comma-separated numbers, or 0 for all)")
-        nums = [int(n.strip()) for n in choices.split(",")]
-
-        if 0 in nums:
-            selected = entries
-        else:
-            selected = []
-            for n in nums:
-                if n < 1 or n > len(entries):
-                    console.print(f"[red]Invalid selection: {n}[/red]")
-                    raise typer.Exit(1)
-                selected.append(entries[n - 1])
+        selected = _parse_selection(choices, entries)
 
     if test_email:
         console.print(Panel.fit(
@@ -1835,56 +2032,54 @@ def ec2_email_credentials(
             title="📧 Gmail",
         ))
 
-    email_results: list[dict[str, object]] = []
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("[cyan]Sending emails...", total=len(selected))
-        for i, entry in enumerate(selected, 1):
-            recipient = test_email if test_email else entry["email"]
-            username = entry["username"]
+    def _send_one(recipient: str, subfolder_id: str) -> dict:
+        body_text = VM_ACCESS_EMAIL_TEMPLATE.format(folder_id=subfolder_id, sender_name=sender_name)
+        return send_email(to=recipient, subject=VM_ACCESS_EMAIL_SUBJECT, body_text=body_text)
 
-            progress.update(task, completed=i, description=f"[cyan]Emailing {recipient}")
-
-            subfolder_name = f"VM Access - {username}"
-            subfolder_id = student_folders.get(subfolder_name)
-            if not subfolder_id:
-                console.print(f"[red]Subfolder not found for {username}[/red]")
-                email_results.append({"email": recipient, "sent": False})
-                continue
+    email_results = [
+        {"email": test_email or entry["email"], "sent": False} for entry in selected
+    ]
+    to_send = []
+    for entry, result in zip(selected, email_results):
+        subfolder_id = student_folders.get(f"VM Access - {entry['username']}")
+        if subfolder_id:
+            to_send.append((result, subfolder_id))
+        else:
+            console.print(f"[red]Subfolder not found for {entry['username']}[/red]")
 
-            folder_link = f"https://drive.google.com/drive/folders/{subfolder_id}"
-
-            subject = "Your Virtual Machine Access"
-            body_text = (
-                f"Hello,\n\n"
-                f"A virtual machine has been set up for you. Your SSH key and\n"
-                f"connection instructions are in the Google Drive folder below:\n\n"
-                f"    {folder_link}\n\n"
-                f"Open the folder and follow the instructions in the\n"
-                f"'Connection Details' document to get started.\n\n"
-                f"Best regards,\n{sender_name}\n"
-            )
+    if to_send:
+        # Authenticate once up front so the worker threads don't each start
+        # an OAuth flow.
+        try:
+            _get_gmail_credentials()
+        except Exception as e:
+            console.print(f"[red]Gmail authentication failed: {e}[/red]")
+            raise typer.Exit(1)
 
-            email_sent = False
+    # Each send is a Gmail API round trip, so they go out in parallel;
+    # results keep the selection order for the summary.
+    with _progress() as progress, ThreadPoolExecutor(max_workers=max(1, min(16, len(to_send)))) as pool:
+        task = progress.add_task("[cyan]Sending emails...", total=len(to_send))
+        futures = {
+            pool.submit(_send_one, result["email"], subfolder_id): result
+            for result, subfolder_id in to_send
+        }
+        for future in as_completed(futures):
+            result = futures[future]
+            recipient = result["email"]
+            progress.update(task, advance=1, description=f"[cyan]Emailed {recipient}")
             try:
-                result = send_email(to=recipient, subject=subject, body_text=body_text)
-                email_sent = result.get("success", False)
-                if not email_sent:
+                sent = future.result()
+                result["sent"] = sent.get("success", False)
+                if not result["sent"]:
                     console.print(
                         f"[red]Failed to email {recipient}: "
-                        f"{result.get('error', 'unknown error')}[/red]"
+                        f"{sent.get('error', 'unknown error')}[/red]"
                     )
             except Exception as e:
                 console.print(f"[red]Failed to email {recipient}: {e}[/red]")
 
-            email_results.append({"email": recipient, "sent": email_sent})
-
-    sent_count = sum(1 for r in email_results if r["sent"])
+    sent_count = sum(r["sent"] for r in email_results)
     console.print()
     console.print(Panel.fit(
         f"[bold]Total:[/bold] {len(email_results)} | "
@@ -1904,14 +2099,7 @@ def _run_all_check(
     Mirrors the real launch → share pipeline using a single test student
     and a real EC2 instance.
     """
-    import json
-    from edutools.aws import (
-        INSTRUCTOR_KEY_FILENAME,
-        SSH_SCRIPT_FILENAME,
-        build_connection_doc,
-        build_ssh_script,
-        check_ec2_launch,
-    )
+    from edutools.aws import INSTRUCTOR_KEY_FILENAME, check_ec2_launch
     import edutools.google_helpers as google_helpers
 
     if launch_template is None:
@@ -1947,13 +2135,7 @@ def _run_all_check(
     console.print()
 
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console,
-        ) as progress:
+        with _progress() as progress:
             task = progress.add_task("[cyan]Starting...", total=5)
             vm_result = check_ec2_launch(
                 launch_template=launch_template,
@@ -1989,52 +2171,18 @@ def _run_all_check(
         step_results.append(("Launch VM", "passed"))
         passed += 1
 
-        # Upload to Google Drive (part of the launch step, just like the real flow)
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console,
-        ) as progress:
-            task = progress.add_task("[cyan]Uploading to Google Drive...", total=3)
-
-            progress.update(task, completed=1, description=f"[cyan]Creating Drive folder '{test_course}'...")
-            course_folder_id = google_helpers.create_folder(test_course)
-
-            progress.update(task, completed=2, description="[cyan]Uploading manifest.json...")
-            manifest = [
-                {
-                    "email": test_email,
-                    "username": test_username,
-                    "instance_id": vm_result["instance_id"],
-                    "public_ip": vm_result["public_ip"],
-                    "status": "launched",
-                }
-            ]
-            google_helpers.upload_text_file(
-                "manifest.json", json.dumps(manifest, indent=2), course_folder_id,
-            )
-
-            progress.update(task, completed=3, description=f"[cyan]Uploading keys for {test_username}...")
-            student_folder_id = google_helpers.create_folder(
-                f"VM Access - {test_username}", parent_id=course_folder_id,
-            )
-            script = build_ssh_script(
-                username=test_username,
-                public_ip=vm_result["public_ip"],
-                instance_id=vm_result["instance_id"],
-                private_key=vm_result["private_key"],
-            )
-            google_helpers.upload_text_file(SSH_SCRIPT_FILENAME, script, student_folder_id)
-            doc_text = build_connection_doc(
-                username=test_username,
-                public_ip=vm_result["public_ip"],
-                instance_id=vm_result["instance_id"],
-            )
-            google_helpers.create_doc_with_content(
-                f"Connection Details - {test_username}", doc_text, folder_id=student_folder_id,
-            )
+        # Upload to Google Drive (part of the launch step) through the same
+        # batched folder creation and parallel uploads as the real flow.
+        failures = _upload_launch_to_drive(test_course, [{
+            "email": test_email,
+            "username": test_username,
+            "instance_id": vm_result["instance_id"],
+            "public_ip": vm_result["public_ip"],
+            "private_key": vm_result["private_key"],
+            "status": "launched",
+        }])
+        if failures:
+            raise RuntimeError(f"Drive upload failed: {failures[test_username]}")
 
         console.print(f"\n[green]Keys uploaded to Drive folder: [bold]{test_course}[/bold][/green]")
 
@@ -2060,18 +2208,13 @@ def _run_all_check(
         if not folders:
             raise RuntimeError(f"Drive folder '{test_course}' not found")
 
-        folder_id = folders[0]["id"]
-        contents = google_helpers.list_folder_contents(folder_id)
-        student_folders = {
-            f["name"]: f["id"]
-            for f in contents
-            if f["mimeType"] == "application/vnd.google-apps.folder"
-        }
-
         subfolder_name = f"VM Access - {test_username}"
-        subfolder_id = student_folders.get(subfolder_name)
-        if not subfolder_id:
+        subfolder = google_helpers.find_child(
+            folders[0]["id"], subfolder_name, mime_type="application/vnd.google-apps.folder",
+        )
+        if not subfolder:
             raise RuntimeError(f"Subfolder '{subfolder_name}' not found")
+        subfolder_id = subfolder["id"]
 
         with console.status(f"[bold green]Sharing with {test_email}...", spinner="dots"):
             google_helpers.share_with_user(subfolder_id, test_email)
@@ -2163,7 +2306,7 @@ def run_all(
     _cid = course_id
     _lt = launch_template
     steps: list[tuple[str, object]] = [
-        ("Launch VMs", lambda: launch_vms(course_id=_cid, launch_template=_lt)),
+        ("Launch VMs", lambda: launch_vms(course_id=_cid, launch_template=_lt, cloud_init=False)),
         ("Share Keys", lambda: share_keys(course_id=_cid)),
     ]
 
@@ -2263,13 +2406,7 @@ def terminate_vms(
             console.print("[yellow]Aborted.[/yellow]")
             raise typer.Exit()
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Starting...", total=None)
         results = terminate_student_vms(
             course_id,
@@ -2361,13 +2498,7 @@ def google_check(
     status = "error"
     error_detail = ""
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Starting...", total=total_steps)
 
         try:
@@ -2464,13 +2595,7 @@ def google_check_cleanup(
 
     deleted = 0
     errors = 0
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TaskProgressColumn(),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("[cyan]Deleting...", total=len(folders))
         for i, folder in enumerate(folders, 1):
             progress.update(task, completed=i, description=f"[cyan]Deleting {folder['id']}...")
@@ -2493,7 +2618,12 @@ def google_check_cleanup(
 # ============================================================================
 
 @app.callback(invoke_without_command=True)
-def main(ctx: typer.Context):
+def main(
+    ctx: typer.Context,
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Always fetch fresh data from Canvas and AWS"
+    ),
+):
     """
     🎓 [bold green]Edu Tools[/bold green] - Educational Technology CLI
 
@@ -2502,6 +2632,9 @@ def main(ctx: typer.Context):
     [dim]Use --help with any command for more information.[/dim]
     """
     init()
+    if no_cache:
+        os.environ["CANVAS_NO_CACHE"] = "1"
+        os.environ["EDUTOOLS_NO_CACHE"] = "1"
     if ctx.invoked_subcommand is None:
         console.print(Panel.fit(
             "[bold green]🎓 Edu Tools CLI[/bold green]\n\n"
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
 import base64
+import functools
 import os.path
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import List, Dict, Any, Optional
 
+import google_auth_httplib2
 from google.auth.transport.requests import Request
 from google.auth.credentials import Credentials
 from google.oauth2.credentials import Credentials as OAuthCredentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
 
 # Scopes for Docs and Drive
 DOCS_SCOPES = [
@@ -30,8 +34,9 @@ ALL_SCOPES = DOCS_SCOPES + GMAIL_SCOPES
 SCOPES = DOCS_SCOPES
 
 
+@functools.cache
 def _config_dir() -> str:
-    """Return the config directory, creating it if needed."""
+    """Return the config directory, creating it on first use."""
     config = os.path.join(os.path.expanduser("~"), ".config", "edutools")
     os.makedirs(config, exist_ok=True)
     return config
@@ -51,7 +56,13 @@ def _get_oauth_path() -> str:
     )
 
 
+@functools.lru_cache(maxsize=1)
 def _get_credentials() -> Credentials:
+    """Load (and refresh if needed) Docs/Drive credentials once per process.
+
+    The returned credentials refresh themselves on expiry, so caching the
+    object avoids re-reading and re-parsing the token file on every call.
+    """
     GOOGLE_TOKEN_PATH = os.path.join(_config_dir(), "google_token.json")
     GOOGLE_OAUTH_PATH = _get_oauth_path()
 
@@ -72,20 +83,52 @@ def _get_credentials() -> Credentials:
     return creds
 
 
+# Built service clients, one set per thread: the underlying httplib2
+# transport is not thread-safe, but rebuilding a client per call is wasteful.
+_services = threading.local()
+
+
+def _authorized_http(credentials: Credentials) -> google_auth_httplib2.AuthorizedHttp:
+    """Wrap this thread's shared ``httplib2.Http`` with *credentials*.
+
+    Every service built on a thread sends through the same ``Http``, so
+    Docs, Drive and Gmail calls reuse its keep-alive connections instead
+    of each client opening its own.
+    """
+    http = getattr(_services, "http", None)
+    if http is None:
+        http = build_http()
+        _services.http = http
+    return google_auth_httplib2.AuthorizedHttp(credentials, http=http)
+
+
 def _docs_service():
-    creds = _get_credentials()
-    return build("docs", "v1", credentials=creds)
+    service = getattr(_services, "docs", None)
+    if service is None:
+        service = build(
+            "docs", "v1", http=_authorized_http(_get_credentials()), cache_discovery=False,
+        )
+        _services.docs = service
+    return service
 
 
 def _drive_service():
-    creds = _get_credentials()
-    return build("drive", "v3", credentials=creds)
+    service = getattr(_services, "drive", None)
+    if service is None:
+        service = build(
+            "drive", "v3", http=_authorized_http(_get_credentials()), cache_discovery=False,
+        )
+        _services.drive = service
+    return service
 
 
 def create_doc(title: str, folder_id: Optional[str] = None) -> str:
     """
     Create a Google Doc and optionally place it in a folder.
 
+    The document is created through Drive with its parent set up front, so
+    this is a single API call rather than a create followed by a move.
+
     Args:
         title: Document title
         folder_id: Optional Google Drive folder ID to place the document in
@@ -93,19 +136,15 @@ def create_doc(title: str, folder_id: Optional[str] = None) -> str:
     Returns:
         The document ID
     """
-    service = _docs_service()
-    body = {"title": title}
-
-    doc = service.documents().create(body=body).execute()
-    doc_id = doc["documentId"]
-
-    # Move to folder if specified
+    drive = _drive_service()
+    metadata: Dict[str, Any] = {
+        "name": title,
+        "mimeType": "application/vnd.google-apps.document",
+    }
     if folder_id:
-        drive = _drive_service()
-        drive.files().update(
-            fileId=doc_id, addParents=folder_id, fields="id, parents"
-        ).execute()
-
+        metadata["parents"] = [folder_id]
+    doc: Dict[str, Any] = drive.files().create(body=metadata, fields="id").execute()
+    doc_id: str = doc["id"]
     return doc_id
 
 
@@ -178,6 +217,65 @@ def create_folder(name: str, parent_id: Optional[str] = None) -> str:
     return folder_id
 
 
+# Drive accepts at most 100 calls in one batch request.
+_BATCH_LIMIT = 100
+
+
+def _run_batch(requests: List[Any]) -> List[tuple[Dict[str, Any], Optional[Exception]]]:
+    """Run unexecuted Drive requests through the batch endpoint.
+
+    Requests are sent in groups of up to 100 per HTTP round-trip.  Only
+    metadata calls can be batched; Drive rejects batched media uploads.
+
+    Returns:
+        ``(response, error)`` per request, in the same order as *requests*.
+    """
+    drive = _drive_service()
+    outcomes: List[tuple[Dict[str, Any], Optional[Exception]]] = [({}, None) for _ in requests]
+
+    def callback(request_id: str, response: Dict[str, Any], exception: Optional[Exception]) -> None:
+        outcomes[int(request_id)] = (response or {}, exception)
+
+    for start in range(0, len(requests), _BATCH_LIMIT):
+        batch = drive.new_batch_http_request(callback=callback)
+        for i, request in enumerate(requests[start:start + _BATCH_LIMIT], start):
+            batch.add(request, request_id=str(i))
+        batch.execute()
+    return outcomes
+
+
+def create_folders(
+    names: List[str], parent_id: Optional[str] = None,
+) -> List[tuple[str, str]]:
+    """Create several Google Drive folders with batched requests.
+
+    One failed create (e.g. ``userRateLimitExceeded``) does not lose the
+    IDs of the folders that were created.
+
+    Args:
+        names: Folder names.
+        parent_id: Optional parent folder ID shared by all the folders.
+
+    Returns:
+        One ``(folder_id, error)`` pair per name, in order: the error is
+        empty on success, otherwise the folder ID is empty.
+    """
+    drive = _drive_service()
+    requests = []
+    for name in names:
+        metadata: Dict[str, Any] = {
+            "name": name,
+            "mimeType": "application/vnd.google-apps.folder",
+        }
+        if parent_id:
+            metadata["parents"] = [parent_id]
+        requests.append(drive.files().create(body=metadata, fields="id"))
+    return [
+        (folder["id"], "") if error is None else ("", str(error))
+        for folder, error in _run_batch(requests)
+    ]
+
+
 def create_doc_with_content(
     title: str, content: str, folder_id: Optional[str] = None,
 ) -> str:
@@ -279,6 +377,34 @@ def share_with_user(file_id: str, email: str, role: str = "reader") -> str:
     return perm_id
 
 
+def share_with_users(shares: List[tuple[str, str]], role: str = "reader") -> List[str]:
+    """Share several Drive files or folders using batched requests.
+
+    Like :func:`share_with_user`, but every permission is created through
+    the batch endpoint, up to 100 per round-trip.  One failed share does
+    not stop the others.
+
+    Args:
+        shares: ``(file_id, email)`` pairs to grant *role* on.
+        role: Permission role (``reader``, ``writer``, ``commenter``).
+
+    Returns:
+        One entry per share, in order: an empty string on success,
+        otherwise the error message.
+    """
+    drive = _drive_service()
+    requests = [
+        drive.permissions().create(
+            fileId=file_id,
+            body={"type": "user", "role": role, "emailAddress": email},
+            fields="id",
+            sendNotificationEmail=True,
+        )
+        for file_id, email in shares
+    ]
+    return ["" if error is None else str(error) for _, error in _run_batch(requests)]
+
+
 def find_files_by_name(name: str, mime_type: Optional[str] = None) -> list[Dict[str, str]]:
     """Find Drive files whose name exactly matches *name*.
 
@@ -342,25 +468,88 @@ def delete_file(file_id: str) -> None:
     drive.files().delete(fileId=file_id).execute()
 
 
-def list_folder_contents(folder_id: str) -> list[Dict[str, str]]:
+def _quote(value: str) -> str:
+    """Quote *value* as a string literal for a Drive ``q`` query."""
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def list_folder_contents(
+    folder_id: str, mime_type: Optional[str] = None,
+) -> list[Dict[str, str]]:
     """List all files and folders inside a Drive folder.
 
+    Follows ``nextPageToken`` so folders with more children than fit in
+    one response are listed completely.
+
     Args:
         folder_id: Google Drive folder ID.
+        mime_type: Optional MIME type filter (e.g.
+            ``application/vnd.google-apps.folder`` to list only subfolders).
 
     Returns:
         List of dicts with keys: id, name, mimeType.
     """
     drive = _drive_service()
-    q = f"'{folder_id}' in parents and trashed = false"
+    q = f"{_quote(folder_id)} in parents and trashed = false"
+    if mime_type:
+        q += f" and mimeType = {_quote(mime_type)}"
+    files: list[Dict[str, str]] = []
+    page_token: Optional[str] = None
+    while True:
+        resp: Dict[str, Any] = drive.files().list(
+            q=q,
+            fields="nextPageToken, files(id, name, mimeType)",
+            pageSize=1000,
+            pageToken=page_token,
+        ).execute()
+        files.extend(
+            {"id": f["id"], "name": f["name"], "mimeType": f["mimeType"]}
+            for f in resp.get("files", [])
+        )
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return files
+
+
+def find_child(
+    parent_id: str, name: str, mime_type: Optional[str] = None,
+) -> Optional[Dict[str, str]]:
+    """Find a file named *name* directly inside a Drive folder.
+
+    Args:
+        parent_id: Google Drive folder ID to look in.
+        name: Exact file/folder name.
+        mime_type: Optional MIME type filter.
+
+    Returns:
+        A dict with keys id, name, mimeType, or ``None`` if not found.
+    """
+    drive = _drive_service()
+    q = f"{_quote(parent_id)} in parents and name = {_quote(name)} and trashed = false"
+    if mime_type:
+        q += f" and mimeType = {_quote(mime_type)}"
     resp: Dict[str, Any] = drive.files().list(
-        q=q, fields="files(id, name, mimeType)",
+        q=q, fields="files(id, name, mimeType)", pageSize=1,
     ).execute()
-    files: list[Dict[str, str]] = [
-        {"id": f["id"], "name": f["name"], "mimeType": f["mimeType"]}
-        for f in resp.get("files", [])
-    ]
-    return files
+    for f in resp.get("files", []):
+        return {"id": f["id"], "name": f["name"], "mimeType": f["mimeType"]}
+    return None
+
+
+def get_parents(file_id: str) -> list[str]:
+    """Return the IDs of the folders containing a Drive file.
+
+    Args:
+        file_id: Google Drive file or folder ID.
+
+    Returns:
+        List of parent folder IDs (empty for files in no folder).
+    """
+    drive = _drive_service()
+    resp: Dict[str, Any] = drive.files().get(fileId=file_id, fields="parents").execute()
+    parents: list[str] = resp.get("parents", [])
+    return parents
 
 
 def download_text_file(file_id: str) -> str:
@@ -383,8 +572,9 @@ def download_text_file(file_id: str) -> str:
 # Gmail Functions
 # ============================================================================
 
+@functools.lru_cache(maxsize=1)
 def _get_gmail_credentials() -> Credentials:
-    """Get credentials with Gmail scope."""
+    """Get credentials with Gmail scope, loaded once per process."""
     GOOGLE_OAUTH_PATH = _get_oauth_path()
 
     # Use a separate token file for Gmail to avoid scope conflicts
@@ -408,9 +598,14 @@ def _get_gmail_credentials() -> Credentials:
 
 
 def _gmail_service():
-    """Get Gmail API service."""
-    creds = _get_gmail_credentials()
-    return build("gmail", "v1", credentials=creds)
+    """Get this thread's Gmail API service, building it on first use."""
+    service = getattr(_services, "gmail", None)
+    if service is None:
+        service = build(
+            "gmail", "v1", http=_authorized_http(_get_gmail_credentials()), cache_discovery=False,
+        )
+        _services.gmail = service
+    return service
 
 
 def send_email(
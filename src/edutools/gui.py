@@ -89,7 +89,7 @@ class EdutoolsApp(tk.Tk):
             try:
                 from edutools.canvas import CanvasLMS
 
-                canvas = CanvasLMS()
+                canvas = CanvasLMS(disk_cache=False)
                 courses = canvas.get_courses()
                 lines.append(f"Canvas LMS: OK ({len(courses)} courses)")
             except Exception as exc:
@@ -5,20 +5,96 @@ import os
 import secrets
 import string
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Callable, Optional
 
 import boto3
 from botocore.exceptions import ClientError
 
-from edutools.canvas import CanvasLMS
+from edutools.canvas import CanvasLMS, username_from_email
 
 
 def _default_progress(current: int, total: int, message: str) -> None:
     """Default progress callback that prints to stderr."""
     print(f"[{current}/{total}] {message}", file=sys.stderr)
 
+
+# IAM mutations are independent per user, so each course-wide operation fans
+# out over a thread pool.  boto3 clients are thread-safe; ten workers stays
+# comfortably inside IAM's per-account API rate limits.
+DEFAULT_MAX_WORKERS = 10
+
+
+def _for_each_student(
+    students: list[dict],
+    process: Callable[[str, str], dict],
+    *,
+    skipped: dict,
+    action: str,
+    max_workers: int,
+    progress_callback: Optional[Callable[[int, int, str], None]],
+) -> list[dict]:
+    """Run ``process(email, username)`` concurrently for every student.
+
+    Students without an email get ``skipped`` (plus a placeholder email)
+    instead.  If ``process`` raises for a student, that student gets an
+    ``error`` row and the others still complete.  Progress is reported from
+    the calling thread as each student finishes, and results are returned
+    in roster order.
+    """
+    total = len(students)
+    results: list[dict] = [{}] * total
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {}
+        for idx, student in enumerate(students):
+            email = student.get("email", "")
+            if not email:
+                placeholder = f"user_{student.get('id', 'unknown')}"
+                results[idx] = {"email": placeholder, **skipped}
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total, f"Skipping {placeholder} (no email)")
+                continue
+            username = username_from_email(email)
+            futures[pool.submit(process, email, username)] = (idx, email, username)
+
+        for future in as_completed(futures):
+            idx, email, username = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                results[idx] = {
+                    **skipped, "email": email, "username": username, "status": "error", "error": str(e),
+                }
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, f"{action}: {username}")
+    return results
+
 EC2_POLICY_NAME = "EC2OnlyAccess"
 
+CREDENTIALS_EMAIL_SUBJECT = "Your AWS Account Credentials"
+
+# Plain-text credentials email, filled per student with str.format.
+CREDENTIALS_EMAIL_TEMPLATE = """\
+Hello,
+
+Your AWS IAM account has been created. Here are your login credentials:
+
+Sign-in URL: {sign_in_url}
+Username: {username}
+Temporary Password: {password}
+
+IMPORTANT: You will be required to change your password on first login.
+
+Your account has permissions to use EC2 (virtual machines) in the us-west-2 region only.
+
+Best regards,
+{sender_name}
+"""
+
 # EC2-only policy for student users (restricted to us-west-2)
 EC2_POLICY = {
     "Version": "2012-10-17",
@@ -79,6 +155,10 @@ class IAMProvisioner:
         self._account_id: Optional[str] = None
         self._sign_in_url: Optional[str] = None
         self._policy_arn_cached: Optional[str] = None
+        # ARN of the managed policy once ensure_ec2_policy has run, so
+        # per-user attaches don't each publish a new policy version.
+        self._policy_ready: Optional[str] = None
+        self._policy_lock = threading.Lock()
 
     def _policy_arn(self) -> str:
         """Get the ARN for the EC2 managed policy."""
@@ -127,6 +207,7 @@ class IAMProvisioner:
             else:
                 raise
 
+        self._policy_ready = arn
         return arn
 
     def get_account_id(self) -> str:
@@ -241,7 +322,8 @@ class IAMProvisioner:
             True if successful, False otherwise
         """
         try:
-            arn = self.ensure_ec2_policy()
+            with self._policy_lock:
+                arn = self._policy_ready or self.ensure_ec2_policy()
             self.client.attach_user_policy(
                 UserName=username,
                 PolicyArn=arn,
@@ -371,49 +453,32 @@ class IAMProvisioner:
 def provision_students(
     course_id: str,
     progress_callback: Optional[Callable[[int, int, str], None]] = _default_progress,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    students: Optional[list[dict]] = None,
 ) -> list[dict]:
     """Provision IAM users for all students in a Canvas course.
 
     Args:
         course_id: The Canvas course ID
         progress_callback: Optional callback for progress updates (current, total, message)
+        max_workers: Maximum number of users created concurrently
+        students: Roster already fetched from Canvas (fetched here if omitted)
 
     Returns:
         List of dicts with: email, username, password, status
     """
-    canvas = CanvasLMS()
     iam = IAMProvisioner()
 
-    if progress_callback:
-        progress_callback(0, 0, "Fetching students from Canvas...")
-
-    students = canvas.get_students(course_id)
+    if students is None:
+        if progress_callback:
+            progress_callback(0, 0, "Fetching students from Canvas...")
+        students = CanvasLMS(disk_cache=False).get_students(course_id)
     total = len(students)
-    results = []
 
     if progress_callback:
         progress_callback(0, total, f"Found {total} students. Starting provisioning...")
 
-    for i, student in enumerate(students, 1):
-        email = student.get("email", "")
-        if not email:
-            if progress_callback:
-                progress_callback(i, total, f"Skipping user_{student.get('id', 'unknown')} (no email)")
-            results.append({
-                "email": f"user_{student.get('id', 'unknown')}",
-                "username": None,
-                "password": None,
-                "status": "skipped",
-                "error": "no email",
-            })
-            continue
-
-        # Extract username from email prefix
-        username = email.split("@")[0]
-
-        if progress_callback:
-            progress_callback(i, total, f"Creating IAM user: {username}")
-
+    def provision_one(email: str, username: str) -> dict:
         # Create the IAM user
         user_result = iam.create_user(username)
 
@@ -421,12 +486,21 @@ def provision_students(
         if user_result["status"] == "created":
             iam.attach_ec2_policy(username)
 
-        results.append({
+        return {
             "email": email,
             "username": username,
             "password": user_result["password"],
             "status": user_result["status"],
-        })
+        }
+
+    results = _for_each_student(
+        students,
+        provision_one,
+        skipped={"username": None, "password": None, "status": "skipped", "error": "no email"},
+        action="Created IAM user",
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+    )
 
     if progress_callback:
         progress_callback(total, total, "Provisioning complete!")
@@ -437,58 +511,48 @@ def provision_students(
 def reset_student_passwords(
     course_id: str,
     progress_callback: Optional[Callable[[int, int, str], None]] = _default_progress,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    students: Optional[list[dict]] = None,
 ) -> list[dict]:
     """Reset passwords for all student IAM users in a Canvas course.
 
     Args:
         course_id: The Canvas course ID
         progress_callback: Optional callback for progress updates (current, total, message)
+        max_workers: Maximum number of passwords reset concurrently
+        students: Roster already fetched from Canvas (fetched here if omitted)
 
     Returns:
         List of dicts with: email, username, password, status
     """
-    canvas = CanvasLMS()
     iam = IAMProvisioner()
 
-    if progress_callback:
-        progress_callback(0, 0, "Fetching students from Canvas...")
-
-    students = canvas.get_students(course_id)
+    if students is None:
+        if progress_callback:
+            progress_callback(0, 0, "Fetching students from Canvas...")
+        students = CanvasLMS(disk_cache=False).get_students(course_id)
     total = len(students)
-    results = []
 
     if progress_callback:
         progress_callback(0, total, f"Found {total} students. Starting password reset...")
 
-    for i, student in enumerate(students, 1):
-        email = student.get("email", "")
-        if not email:
-            if progress_callback:
-                progress_callback(i, total, f"Skipping user_{student.get('id', 'unknown')} (no email)")
-            results.append({
-                "email": f"user_{student.get('id', 'unknown')}",
-                "username": None,
-                "password": None,
-                "status": "skipped",
-                "error": "no email",
-            })
-            continue
-
-        # Extract username from email prefix
-        username = email.split("@")[0]
-
-        if progress_callback:
-            progress_callback(i, total, f"Resetting password: {username}")
-
-        # Reset the password
+    def reset_one(email: str, username: str) -> dict:
         reset_result = iam.reset_password(username)
-
-        results.append({
+        return {
             "email": email,
             "username": username,
             "password": reset_result["password"],
             "status": reset_result["status"],
-        })
+        }
+
+    results = _for_each_student(
+        students,
+        reset_one,
+        skipped={"username": None, "password": None, "status": "skipped", "error": "no email"},
+        action="Reset password",
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+    )
 
     if progress_callback:
         progress_callback(total, total, "Password reset complete!")
@@ -499,17 +563,20 @@ def reset_student_passwords(
 def update_student_policies(
     course_id: str,
     progress_callback: Optional[Callable[[int, int, str], None]] = _default_progress,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    students: Optional[list[dict]] = None,
 ) -> list[dict]:
     """Update the EC2 policy for all student IAM users in a Canvas course.
 
     Args:
         course_id: The Canvas course ID
         progress_callback: Optional callback for progress updates (current, total, message)
+        max_workers: Maximum number of users updated concurrently
+        students: Roster already fetched from Canvas (fetched here if omitted)
 
     Returns:
         List of dicts with: email, username, status
     """
-    canvas = CanvasLMS()
     iam = IAMProvisioner()
 
     if progress_callback:
@@ -519,43 +586,32 @@ def update_student_policies(
     # who already have it attached.
     iam.ensure_ec2_policy()
 
-    if progress_callback:
-        progress_callback(0, 0, "Fetching students from Canvas...")
-
-    students = canvas.get_students(course_id)
+    if students is None:
+        if progress_callback:
+            progress_callback(0, 0, "Fetching students from Canvas...")
+        students = CanvasLMS(disk_cache=False).get_students(course_id)
     total = len(students)
-    results = []
 
     if progress_callback:
         progress_callback(0, total, f"Found {total} students. Ensuring policy attachment...")
 
-    for i, student in enumerate(students, 1):
-        email = student.get("email", "")
-        if not email:
-            if progress_callback:
-                progress_callback(i, total, f"Skipping user_{student.get('id', 'unknown')} (no email)")
-            results.append({
-                "email": f"user_{student.get('id', 'unknown')}",
-                "username": None,
-                "status": "skipped",
-                "error": "no email",
-            })
-            continue
-
-        # Extract username from email prefix
-        username = email.split("@")[0]
-
-        if progress_callback:
-            progress_callback(i, total, f"Attaching policy: {username}")
-
+    def update_one(email: str, username: str) -> dict:
         # Ensure managed policy is attached (also migrates from inline)
         success = iam.attach_ec2_policy(username)
-
-        results.append({
+        return {
             "email": email,
             "username": username,
             "status": "updated" if success else "error",
-        })
+        }
+
+    results = _for_each_student(
+        students,
+        update_one,
+        skipped={"username": None, "status": "skipped", "error": "no email"},
+        action="Attached policy",
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+    )
 
     if progress_callback:
         progress_callback(total, total, "Policy update complete!")
@@ -567,6 +623,7 @@ def provision_and_email_students(
     course_id: str,
     sender_name: str = "Course Instructor",
     progress_callback: Optional[Callable[[int, int, str], None]] = _default_progress,
+    students: Optional[list[dict]] = None,
 ) -> list[dict]:
     """Provision IAM users and email credentials to all students.
 
@@ -574,13 +631,13 @@ def provision_and_email_students(
         course_id: The Canvas course ID
         sender_name: Name to use in the email signature
         progress_callback: Optional callback for progress updates
+        students: Roster already fetched from Canvas (fetched here if omitted)
 
     Returns:
         List of dicts with: email, username, password, status, email_sent
     """
     from edutools.google_helpers import send_email
 
-    canvas = CanvasLMS()
     iam = IAMProvisioner()
 
     if progress_callback:
@@ -588,10 +645,10 @@ def provision_and_email_students(
 
     sign_in_url = iam.get_sign_in_url()
 
-    if progress_callback:
-        progress_callback(0, 0, "Fetching students from Canvas...")
-
-    students = canvas.get_students(course_id)
+    if students is None:
+        if progress_callback:
+            progress_callback(0, 0, "Fetching students from Canvas...")
+        students = CanvasLMS(disk_cache=False).get_students(course_id)
     total = len(students)
     results = []
 
@@ -614,7 +671,7 @@ def provision_and_email_students(
             continue
 
         # Extract username from email prefix
-        username = email.split("@")[0]
+        username = username_from_email(email)
 
         if progress_callback:
             progress_callback(i, total, f"Creating IAM user: {username}")
@@ -631,22 +688,13 @@ def provision_and_email_students(
             if progress_callback:
                 progress_callback(i, total, f"Sending email to: {email}")
 
-            subject = "Your AWS Account Credentials"
-            body_text = f"""Hello,
-
-Your AWS IAM account has been created. Here are your login credentials:
-
-Sign-in URL: {sign_in_url}
-Username: {username}
-Temporary Password: {user_result['password']}
-
-IMPORTANT: You will be required to change your password on first login.
-
-Your account has permissions to use EC2 (virtual machines) in the us-west-2 region only.
-
-Best regards,
-{sender_name}
-"""
+            subject = CREDENTIALS_EMAIL_SUBJECT
+            body_text = CREDENTIALS_EMAIL_TEMPLATE.format(
+                sign_in_url=sign_in_url,
+                username=username,
+                password=user_result["password"],
+                sender_name=sender_name,
+            )
             body_html = f"""
 <html>
 <body>
@@ -702,56 +750,47 @@ Best regards,
 def deprovision_students(
     course_id: str,
     progress_callback: Optional[Callable[[int, int, str], None]] = _default_progress,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    students: Optional[list[dict]] = None,
 ) -> list[dict]:
     """Remove IAM users for all students in a Canvas course.
 
     Args:
         course_id: The Canvas course ID
         progress_callback: Optional callback for progress updates (current, total, message)
+        max_workers: Maximum number of users deleted concurrently
+        students: Roster already fetched from Canvas (fetched here if omitted)
 
     Returns:
         List of dicts with: email, username, status
     """
-    canvas = CanvasLMS()
     iam = IAMProvisioner()
 
-    if progress_callback:
-        progress_callback(0, 0, "Fetching students from Canvas...")
-
-    students = canvas.get_students(course_id)
+    if students is None:
+        if progress_callback:
+            progress_callback(0, 0, "Fetching students from Canvas...")
+        students = CanvasLMS(disk_cache=False).get_students(course_id)
     total = len(students)
-    results = []
 
     if progress_callback:
         progress_callback(0, total, f"Found {total} students. Starting deprovisioning...")
 
-    for i, student in enumerate(students, 1):
-        email = student.get("email", "")
-        if not email:
-            if progress_callback:
-                progress_callback(i, total, f"Skipping user_{student.get('id', 'unknown')} (no email)")
-            results.append({
-                "email": f"user_{student.get('id', 'unknown')}",
-                "username": None,
-                "status": "skipped",
-                "error": "no email",
-            })
-            continue
-
-        # Extract username from email prefix
-        username = email.split("@")[0]
-
-        if progress_callback:
-            progress_callback(i, total, f"Deleting IAM user: {username}")
-
-        # Delete the IAM user
+    def deprovision_one(email: str, username: str) -> dict:
         delete_result = iam.delete_user(username)
-
-        results.append({
+        return {
             "email": email,
             "username": username,
             "status": delete_result["status"],
-        })
+        }
+
+    results = _for_each_student(
+        students,
+        deprovision_one,
+        skipped={"username": None, "status": "skipped", "error": "no email"},
+        action="Deleted IAM user",
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+    )
 
     if progress_callback:
         progress_callback(total, total, "Deprovisioning complete!")
@@ -0,0 +1,309 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from paramiko.ssh_exception import SSHException
+
+from edutools.aws import (
+    _DESCRIBE_CHUNK,
+    EC2Provisioner,
+    _open_ssh,
+    _wait_for_port,
+    launch_student_vms,
+)
+
+
+def _client_error(code, message="boom"):
+    return ClientError({"Error": {"Code": code, "Message": message}}, "Op")
+
+
+def _provisioner():
+    """Build an EC2Provisioner with a mocked EC2 client."""
+    with patch("edutools.aws._ec2_client") as mock_client:
+        mock_client.return_value = MagicMock()
+        return EC2Provisioner("us-west-2")
+
+
+class TestLaunchInstances:
+    """Test the bulk RunInstances wrapper"""
+
+    def test_launch_instances_accepts_partial_capacity(self):
+        """Test that EC2 may place fewer than count instances"""
+        ec2 = _provisioner()
+        ec2.ec2.run_instances.return_value = {
+            "Instances": [{"InstanceId": "i-1"}, {"InstanceId": "i-2"}],
+        }
+
+        ids = ec2.launch_instances(launch_template="lab", count=3, extra_tags={"edutools-course": "42"})
+
+        assert ids == ["i-1", "i-2"]
+        kwargs = ec2.ec2.run_instances.call_args.kwargs
+        assert kwargs["MinCount"] == 1
+        assert kwargs["MaxCount"] == 3
+        assert kwargs["LaunchTemplate"] == {"LaunchTemplateName": "lab"}
+
+    def test_tag_instance(self):
+        """Test that per-instance tags are sent to CreateTags"""
+        ec2 = _provisioner()
+        ec2.tag_instance("i-1", {"Name": "jsmith-vm"})
+        ec2.ec2.create_tags.assert_called_once_with(
+            Resources=["i-1"], Tags=[{"Key": "Name", "Value": "jsmith-vm"}]
+        )
+
+
+class TestPollUntil:
+    """Test instance state polling"""
+
+    @patch("edutools.aws.time.sleep")
+    def test_not_found_is_retried(self, mock_sleep):
+        """Test that a not-yet-visible instance is polled again"""
+        ec2 = _provisioner()
+        ec2.ec2.describe_instances.side_effect = [
+            _client_error("InvalidInstanceID.NotFound"),
+            {"Reservations": [{"Instances": [
+                {"InstanceId": "i-1", "State": {"Name": "running"}, "PublicIpAddress": "10.0.0.1"},
+            ]}]},
+        ]
+
+        assert ec2._poll_until(["i-1"], "running", timeout=60) == {"i-1": "10.0.0.1"}
+        assert mock_sleep.call_count == 1
+
+    @patch("edutools.aws.time.sleep")
+    def test_delays_grow_with_jitter_up_to_cap(self, mock_sleep):
+        """Test that poll delays start near 2s and level off near 15s"""
+        ec2 = _provisioner()
+        pending = {"Reservations": [{"Instances": [
+            {"InstanceId": "i-1", "State": {"Name": "pending"}},
+        ]}]}
+        running = {"Reservations": [{"Instances": [
+            {"InstanceId": "i-1", "State": {"Name": "running"}},
+        ]}]}
+        ec2.ec2.describe_instances.side_effect = [pending] * 10 + [running]
+
+        assert ec2._poll_until(["i-1"], "running", timeout=600) == {}
+
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        assert len(delays) == 10
+        assert 1.4 <= delays[0] <= 2.6
+        assert all(10.5 <= d <= 19.5 for d in delays[-3:])
+
+    def test_describe_is_chunked(self):
+        """Test that DescribeInstances is called in chunks of _DESCRIBE_CHUNK IDs"""
+        ec2 = _provisioner()
+        ids = [f"i-{n:04d}" for n in range(_DESCRIBE_CHUNK + 5)]
+
+        def describe(InstanceIds):
+            return {"Reservations": [{"Instances": [
+                {"InstanceId": iid, "State": {"Name": "running"}, "PublicIpAddress": "10.0.0.1"}
+                for iid in InstanceIds
+            ]}]}
+
+        ec2.ec2.describe_instances.side_effect = describe
+        ip_map = ec2._poll_until(ids, "running", timeout=5)
+
+        assert len(ip_map) == len(ids)
+        sizes = [len(c.kwargs["InstanceIds"]) for c in ec2.ec2.describe_instances.call_args_list]
+        assert sizes == [_DESCRIBE_CHUNK, 5]
+
+    @patch("edutools.aws.time.sleep")
+    def test_arrived_instances_are_not_polled_again(self, mock_sleep):
+        """Test that only instances still outstanding are described next round"""
+        ec2 = _provisioner()
+        ec2.ec2.describe_instances.side_effect = [
+            {"Reservations": [{"Instances": [
+                {"InstanceId": "i-1", "State": {"Name": "running"}, "PublicIpAddress": "10.0.0.1"},
+                {"InstanceId": "i-2", "State": {"Name": "pending"}},
+            ]}]},
+            {"Reservations": [{"Instances": [
+                {"InstanceId": "i-2", "State": {"Name": "running"}, "PublicIpAddress": "10.0.0.2"},
+            ]}]},
+        ]
+
+        ip_map = ec2._poll_until(["i-1", "i-2"], "running", timeout=60)
+
+        assert ip_map == {"i-1": "10.0.0.1", "i-2": "10.0.0.2"}
+        calls = ec2.ec2.describe_instances.call_args_list
+        assert [c.kwargs["InstanceIds"] for c in calls] == [["i-1", "i-2"], ["i-2"]]
+
+    def test_terminated_while_starting_raises(self):
+        """Test that an instance dying during startup is reported"""
+        ec2 = _provisioner()
+        ec2.ec2.describe_instances.return_value = {"Reservations": [{"Instances": [
+            {"InstanceId": "i-1", "State": {"Name": "terminated"}},
+        ]}]}
+
+        with pytest.raises(RuntimeError, match="i-1"):
+            ec2._poll_until(["i-1"], "running", timeout=5)
+
+    def test_timeout_raises(self):
+        """Test that an instance that never arrives times out"""
+        ec2 = _provisioner()
+        ec2.ec2.describe_instances.return_value = {"Reservations": [{"Instances": [
+            {"InstanceId": "i-1", "State": {"Name": "pending"}},
+        ]}]}
+
+        with pytest.raises(TimeoutError):
+            ec2._poll_until(["i-1"], "running", timeout=0)
+
+
+class TestOpenSSH:
+    """Test the TCP probe and SSH connect helpers"""
+
+    @patch("edutools.aws.socket.create_connection")
+    def test_wait_for_port_open(self, mock_connect):
+        """Test that an open port returns no error"""
+        assert _wait_for_port("10.0.0.1", 22, deadline=0) == ""
+        mock_connect.assert_called_once_with(("10.0.0.1", 22), timeout=2)
+
+    @patch("edutools.aws.time.sleep")
+    @patch("edutools.aws.socket.create_connection")
+    def test_wait_for_port_gives_up(self, mock_connect, mock_sleep):
+        """Test that a closed port returns the last error after the deadline"""
+        mock_connect.side_effect = ConnectionRefusedError("Connection refused")
+
+        assert _wait_for_port("10.0.0.1", 22, deadline=0) == "Connection refused"
+        mock_sleep.assert_not_called()
+
+    @patch("edutools.aws._wait_for_port", return_value="")
+    @patch("edutools.aws.paramiko.SSHClient")
+    def test_open_ssh_success(self, mock_client_cls, mock_wait):
+        """Test a successful connection returns the client"""
+        ssh, err = _open_ssh("10.0.0.1", MagicMock(), timeout=0, retry_delay=1.0)
+
+        assert ssh is not None
+        assert ssh is mock_client_cls.return_value
+        assert err == ""
+        assert mock_client_cls.return_value.connect.call_args.kwargs["username"] == "ubuntu"
+
+    @patch("edutools.aws.time.sleep")
+    @patch("edutools.aws._wait_for_port", return_value="")
+    @patch("edutools.aws.paramiko.SSHClient")
+    def test_open_ssh_retries_then_succeeds(self, mock_client_cls, mock_wait, mock_sleep):
+        """Test that a failed handshake is retried before the deadline"""
+        mock_client_cls.return_value.connect.side_effect = [SSHException("banner"), None]
+
+        ssh, err = _open_ssh("10.0.0.1", MagicMock(), timeout=60, retry_delay=1.0)
+
+        assert ssh is not None
+        assert err == ""
+        assert mock_client_cls.return_value.connect.call_count == 2
+
+    @patch("edutools.aws._wait_for_port", return_value="")
+    @patch("edutools.aws.paramiko.SSHClient")
+    def test_open_ssh_gives_up(self, mock_client_cls, mock_wait):
+        """Test that the last error is returned once the timeout passes"""
+        mock_client_cls.return_value.connect.side_effect = SSHException("auth failed")
+
+        ssh, err = _open_ssh("10.0.0.1", MagicMock(), timeout=0, retry_delay=1.0)
+
+        assert ssh is None
+        assert err == "auth failed"
+        mock_client_cls.return_value.close.assert_called_once()
+
+    @patch("edutools.aws._wait_for_port", return_value="Connection refused")
+    @patch("edutools.aws.paramiko.SSHClient")
+    def test_open_ssh_port_closed(self, mock_client_cls, mock_wait):
+        """Test that a closed port skips the SSH handshake"""
+        ssh, err = _open_ssh("10.0.0.1", MagicMock(), timeout=0, retry_delay=1.0)
+
+        assert ssh is None
+        assert err == "Connection refused"
+        mock_client_cls.return_value.connect.assert_not_called()
+
+
+class TestLaunchStudentVMs:
+    """Test the bulk launch_student_vms workflow"""
+
+    def _run(self, mock_canvas_cls, mock_ec2_cls, ec2, cloud_init=False):
+        mock_canvas_cls.return_value.get_students.return_value = [
+            {"id": 1, "email": "jsmith@example.edu"},
+            {"id": 2, "email": "mjones@example.edu"},
+            {"id": 3, "email": "alee@example.edu"},
+        ]
+        mock_ec2_cls.return_value = ec2
+        mock_ec2_cls.generate_ssh_key.return_value = ("priv", "pub")
+        mock_ec2_cls.configure_student_ssh.return_value = ""
+        return launch_student_vms(
+            "42",
+            launch_template="lab",
+            instructor_key_path="/tmp/key.pem",
+            cloud_init=cloud_init,
+            progress_callback=None,
+        )
+
+    @patch("edutools.aws.EC2Provisioner")
+    @patch("edutools.aws.CanvasLMS")
+    def test_partial_launch_reports_unplaced_students(self, mock_canvas_cls, mock_ec2_cls):
+        """Test that students EC2 could not place get error rows"""
+        ec2 = MagicMock()
+        ec2.launch_instances.return_value = ["i-1", "i-2"]
+        ec2.wait_for_instances.return_value = {"i-1": "10.0.0.1", "i-2": "10.0.0.2"}
+
+        results = self._run(mock_canvas_cls, mock_ec2_cls, ec2)
+
+        by_user = {r["username"]: r for r in results}
+        assert by_user["jsmith"]["status"] == "launched"
+        assert by_user["mjones"]["status"] == "launched"
+        assert by_user["alee"]["status"] == "error: EC2 launched only 2 of 3 instances"
+        assert by_user["alee"]["instance_id"] == ""
+        mock_canvas_cls.assert_called_once_with(disk_cache=False)
+
+    @patch("edutools.aws.EC2Provisioner")
+    @patch("edutools.aws.CanvasLMS")
+    def test_tagging_failure_is_reported_per_student(self, mock_canvas_cls, mock_ec2_cls):
+        """Test that one CreateTags failure does not abort the other students"""
+        ec2 = MagicMock()
+        ec2.launch_instances.return_value = ["i-1", "i-2", "i-3"]
+        ec2.wait_for_instances.return_value = {"i-1": "10.0.0.1", "i-3": "10.0.0.3"}
+
+        def tag(instance_id, tags):
+            if instance_id == "i-2":
+                raise ConnectionError("connection reset")
+
+        ec2.tag_instance.side_effect = tag
+
+        results = self._run(mock_canvas_cls, mock_ec2_cls, ec2)
+
+        by_user = {r["username"]: r for r in results}
+        assert by_user["mjones"]["status"] == "error: tagging failed: connection reset"
+        assert by_user["mjones"]["instance_id"] == "i-2"
+        assert by_user["jsmith"]["status"] == "launched"
+        assert by_user["alee"]["status"] == "launched"
+        ec2.wait_for_instances.assert_called_once_with(["i-1", "i-3"])
+
+    @patch("edutools.aws.EC2Provisioner")
+    @patch("edutools.aws.CanvasLMS")
+    def test_launch_error_fails_every_student(self, mock_canvas_cls, mock_ec2_cls):
+        """Test that a RunInstances error with nothing placed is reported for all"""
+        ec2 = MagicMock()
+        ec2.launch_instances.side_effect = _client_error("InsufficientInstanceCapacity", "no capacity")
+
+        results = self._run(mock_canvas_cls, mock_ec2_cls, ec2)
+
+        assert len(results) == 3
+        assert all(r["status"] == "error: no capacity" for r in results)
+
+    @patch("edutools.aws.EC2Provisioner")
+    @patch("edutools.aws.CanvasLMS")
+    def test_cloud_init_launch_failure_is_reported_per_student(self, mock_canvas_cls, mock_ec2_cls):
+        """Test that a non-ClientError launch failure keeps the other students' instances"""
+        ec2 = MagicMock()
+        ec2.wait_for_instances.return_value = {"i-1": "10.0.0.1", "i-3": "10.0.0.3"}
+
+        def launch(*, launch_template, tag_specs, user_data):
+            student = next(t["Value"] for t in tag_specs[0]["Tags"] if t["Key"] == "edutools-student")
+            if student == "mjones":
+                raise EndpointConnectionError(endpoint_url="https://ec2.us-west-2.amazonaws.com")
+            assert "pub" in user_data
+            return {"jsmith": "i-1", "alee": "i-3"}[student]
+
+        ec2.launch_instance.side_effect = launch
+
+        results = self._run(mock_canvas_cls, mock_ec2_cls, ec2, cloud_init=True)
+
+        by_user = {r["username"]: r for r in results}
+        assert by_user["mjones"]["status"].startswith("error: Could not connect")
+        assert by_user["jsmith"]["status"] == "launched"
+        assert by_user["alee"]["status"] == "launched"
+        ec2.wait_for_instances.assert_called_once_with(["i-1", "i-3"])
+        mock_ec2_cls.configure_student_ssh.assert_not_called()
@@ -1,7 +1,27 @@
+import json
 import os
+import stat
+import time
 import pytest
 from unittest.mock import patch, MagicMock
-from edutools.canvas import CanvasLMS
+from requests.utils import parse_header_links
+from edutools.canvas import CanvasAPIError, CanvasLMS, cache_dir, clear_disk_cache
+
+
+ENV = {"CANVAS_ENDPOINT": "https://canvas.example.com", "CANVAS_TOKEN": "test_token"}
+
+
+def _mock_response(payload, *, ok=True, status_code=200, text="", link=""):
+    """Build a mock requests.Response returning *payload* from json()."""
+    response = MagicMock()
+    response.ok = ok
+    response.status_code = status_code
+    response.text = text
+    response.json.return_value = payload
+    response.content = json.dumps(payload).encode()
+    response.headers = {"Link": link} if link else {}
+    response.links = {entry["rel"]: entry for entry in parse_header_links(link)} if link else {}
+    return response
 
 
 class TestCanvasLMSInitialization:
@@ -11,58 +31,47 @@ class TestCanvasLMSInitialization:
         """Test successful initialization with valid environment variables"""
         with patch.dict(
             os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token_123"},
+            {"CANVAS_ENDPOINT": "https://canvas.example.com", "CANVAS_TOKEN": "test_token_123"},
         ):
             canvas = CanvasLMS()
-            assert canvas.endpoint == "https://canvas.example.com/api/v1/courses"
+            assert canvas.endpoint == "https://canvas.example.com"
             assert canvas.headers["Authorization"] == "Bearer test_token_123"
 
-    def test_init_missing_endpoint(self):
-        """Test initialization fails without CANVAS_ENDPOINT"""
+    def test_init_default_endpoint(self):
+        """Test initialization falls back to the default endpoint"""
         with patch.dict(os.environ, {"CANVAS_TOKEN": "test_token"}, clear=True):
-            with pytest.raises(ValueError, match="CANVAS_ENDPOINT and CANVAS_TOKEN must be set"):
-                CanvasLMS()
-
-    def test_init_missing_token(self):
-        """Test initialization succeeds even without CANVAS_TOKEN (creates 'Bearer None' header)"""
-        with patch.dict(os.environ, {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1"}, clear=True):
             canvas = CanvasLMS()
-            assert canvas.endpoint == "https://canvas.example.com/api/v1"
-            assert canvas.headers["Authorization"] == "Bearer None"
+            assert canvas.endpoint == "https://boisestatecanvas.instructure.com"
 
-    def test_init_empty_token(self):
-        """Test initialization succeeds with empty CANVAS_TOKEN (creates 'Bearer ' header)"""
-        with patch.dict(
-            os.environ, {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1", "CANVAS_TOKEN": ""}
+    def test_init_missing_token(self):
+        """Test initialization fails without CANVAS_TOKEN"""
+        with (
+            patch.dict(os.environ, {"CANVAS_ENDPOINT": "https://canvas.example.com"}, clear=True),
+            pytest.raises(ValueError, match="CANVAS_TOKEN not set"),
         ):
-            canvas = CanvasLMS()
-            assert canvas.endpoint == "https://canvas.example.com/api/v1"
-            assert canvas.headers["Authorization"] == "Bearer "
+            CanvasLMS()
 
-    def test_init_empty_endpoint(self):
-        """Test initialization fails with empty CANVAS_ENDPOINT"""
-        with patch.dict(
-            os.environ, {"CANVAS_ENDPOINT": "", "CANVAS_TOKEN": "test_token"}
+    def test_init_empty_token(self):
+        """Test initialization fails with empty CANVAS_TOKEN"""
+        with (
+            patch.dict(os.environ, {"CANVAS_ENDPOINT": "https://canvas.example.com", "CANVAS_TOKEN": ""}),
+            pytest.raises(ValueError, match="CANVAS_TOKEN not set"),
         ):
-            with pytest.raises(ValueError, match="CANVAS_ENDPOINT and CANVAS_TOKEN must be set"):
-                CanvasLMS()
+            CanvasLMS()
 
 
 class TestCanvasLMSGetCourses:
     """Test get_courses method"""
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_courses_success(self, mock_get):
         """Test successful retrieval of courses"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = '[{"id": 1, "name": "Course 1"}, {"id": 2, "name": "Course 2"}]'
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([
+            {"id": 1, "name": "Course 1", "workflow_state": "available"},
+            {"id": 2, "name": "Course 2", "workflow_state": "available"},
+        ])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             courses = canvas.get_courses()
 
@@ -77,58 +86,69 @@ class TestCanvasLMSGetCourses:
             call_args = mock_get.call_args
             assert call_args[1]["params"]["state[]"] == "available"
             assert call_args[1]["params"]["enrollment_type"] == "teacher"
-            assert call_args[1]["params"]["per_page"] == 40
-
-    @patch("edutools.canvas.requests.get")
+            assert call_args[1]["params"]["per_page"] == 100
+
+    @patch("edutools.canvas._session.get")
+    def test_get_courses_filters_ended_terms(self, mock_get):
+        """Test get_courses drops unpublished courses and ended terms"""
+        mock_get.return_value = _mock_response([
+            {"id": 1, "workflow_state": "available", "term": {"end_at": "2000-01-01T00:00:00Z"}},
+            {"id": 2, "workflow_state": "unpublished"},
+            {"id": 3, "workflow_state": "available", "term": {"end_at": "2999-01-01T00:00:00Z"}},
+            {"id": 4, "workflow_state": "available", "term": {"end_at": None}},
+            {"id": 5, "workflow_state": "available", "term": {"end_at": "2000-01-01T00:00:00.000-07:00"}},
+            {"id": 6, "workflow_state": "available", "term": {"end_at": "2999-01-01T00:00:00-07:00"}},
+        ])
+
+        with patch.dict(os.environ, ENV):
+            courses = CanvasLMS().get_courses()
+            assert [c["id"] for c in courses] == [3, 4, 6]
+
+    @patch("edutools.canvas._session.get")
+    def test_get_courses_include_all(self, mock_get):
+        """Test get_courses(include_all=True) skips filtering"""
+        mock_get.return_value = _mock_response([
+            {"id": 1, "workflow_state": "completed", "term": {"end_at": "2000-01-01T00:00:00Z"}},
+        ])
+
+        with patch.dict(os.environ, ENV):
+            courses = CanvasLMS().get_courses(include_all=True)
+            assert [c["id"] for c in courses] == [1]
+            assert "state[]" not in mock_get.call_args[1]["params"]
+
+    @patch("edutools.canvas._session.get")
     def test_get_courses_empty(self, mock_get):
         """Test get_courses when no courses available"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = "[]"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             courses = canvas.get_courses()
             assert courses == []
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_courses_api_failure(self, mock_get):
         """Test get_courses when API returns error"""
-        mock_response = MagicMock()
-        mock_response.ok = False
-        mock_response.status_code = 401
-        mock_response.text = "Unauthorized"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response(None, ok=False, status_code=401, text="Unauthorized")
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
-            with pytest.raises(SystemExit) as exc_info:
+            with pytest.raises(CanvasAPIError, match="401"):
                 canvas.get_courses()
-            assert exc_info.value.code == 401
 
 
 class TestCanvasLMSGetAssignments:
     """Test get_assignments method"""
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_assignments_success(self, mock_get):
         """Test successful retrieval of assignments"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = '[{"id": 1, "name": "Assignment 1"}, {"id": 2, "name": "Assignment 2"}]'
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([
+            {"id": 1, "name": "Assignment 1"},
+            {"id": 2, "name": "Assignment 2"},
+        ])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             assignments = canvas.get_assignments(123)
 
@@ -140,58 +160,41 @@ class TestCanvasLMSGetAssignments:
             mock_get.assert_called_once()
             call_args = mock_get.call_args
             assert "/123/assignments" in call_args[0][0]
-            assert call_args[1]["params"]["per_page"] == 150
+            assert call_args[1]["params"]["per_page"] == 100
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_assignments_empty(self, mock_get):
         """Test get_assignments when no assignments exist"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = "[]"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             assignments = canvas.get_assignments(123)
             assert assignments == []
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_assignments_api_failure(self, mock_get):
         """Test get_assignments when API returns error"""
-        mock_response = MagicMock()
-        mock_response.ok = False
-        mock_response.status_code = 404
-        mock_response.text = "Not Found"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response(None, ok=False, status_code=404, text="Not Found")
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
-            with pytest.raises(SystemExit) as exc_info:
+            with pytest.raises(CanvasAPIError, match="404"):
                 canvas.get_assignments(999)
-            assert exc_info.value.code == 404
 
 
 class TestCanvasLMSGetStudents:
     """Test get_students method"""
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_students_success(self, mock_get):
         """Test successful retrieval of students"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = '[{"id": 1, "name": "Student 1"}, {"id": 2, "name": "Student 2"}]'
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([
+            {"id": 1, "name": "Student 1"},
+            {"id": 2, "name": "Student 2"},
+        ])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             students = canvas.get_students(123)
 
@@ -204,58 +207,41 @@ class TestCanvasLMSGetStudents:
             call_args = mock_get.call_args
             assert "/123/users" in call_args[0][0]
             assert call_args[1]["params"]["enrollment_type[]"] == "student"
-            assert call_args[1]["params"]["per_page"] == 150
+            assert call_args[1]["params"]["per_page"] == 100
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_students_empty(self, mock_get):
         """Test get_students when no students enrolled"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = "[]"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             students = canvas.get_students(123)
             assert students == []
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_students_api_failure(self, mock_get):
         """Test get_students when API returns error"""
-        mock_response = MagicMock()
-        mock_response.ok = False
-        mock_response.status_code = 403
-        mock_response.text = "Forbidden"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response(None, ok=False, status_code=403, text="Forbidden")
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
-            with pytest.raises(SystemExit) as exc_info:
+            with pytest.raises(CanvasAPIError, match="403"):
                 canvas.get_students(123)
-            assert exc_info.value.code == 403
 
 
 class TestCanvasLMSGetSubmissions:
     """Test get_submissions method"""
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_submissions_success(self, mock_get):
         """Test successful retrieval of submissions"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = '[{"id": 1, "user_id": 101}, {"id": 2, "user_id": 102}]'
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([
+            {"id": 1, "user_id": 101},
+            {"id": 2, "user_id": 102},
+        ])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             submissions = canvas.get_submissions(123, 456)
 
@@ -267,58 +253,38 @@ class TestCanvasLMSGetSubmissions:
             mock_get.assert_called_once()
             call_args = mock_get.call_args
             assert "/123/assignments/456/submissions" in call_args[0][0]
-            assert call_args[1]["params"]["per_page"] == 150
+            assert call_args[1]["params"]["per_page"] == 100
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_submissions_empty(self, mock_get):
         """Test get_submissions when no submissions exist"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = "[]"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([])
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             submissions = canvas.get_submissions(123, 456)
             assert submissions == []
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_submissions_api_failure(self, mock_get):
         """Test get_submissions when API returns error"""
-        mock_response = MagicMock()
-        mock_response.ok = False
-        mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response(None, ok=False, status_code=500, text="Internal Server Error")
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
-            with pytest.raises(SystemExit) as exc_info:
+            with pytest.raises(CanvasAPIError, match="500"):
                 canvas.get_submissions(123, 456)
-            assert exc_info.value.code == 500
 
 
 class TestCanvasLMSGetAssignment:
     """Test get_assignment method"""
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_assignment_success(self, mock_get):
         """Test successful retrieval of single assignment"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = '{"id": 456, "name": "Final Project", "due_at": "2024-12-15"}'
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response({"id": 456, "name": "Final Project", "due_at": "2024-12-15"})
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
             assignment = canvas.get_assignment(123, 456)
 
@@ -330,59 +296,102 @@ class TestCanvasLMSGetAssignment:
             mock_get.assert_called_once()
             call_args = mock_get.call_args
             assert "/123/assignments/456/" in call_args[0][0]
-            assert call_args[1]["params"]["per_page"] == 150
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_assignment_not_found(self, mock_get):
         """Test get_assignment when assignment doesn't exist"""
-        mock_response = MagicMock()
-        mock_response.ok = False
-        mock_response.status_code = 404
-        mock_response.text = "Not Found"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response(None, ok=False, status_code=404, text="Not Found")
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
-            with pytest.raises(SystemExit) as exc_info:
+            with pytest.raises(CanvasAPIError, match="404") as exc_info:
                 canvas.get_assignment(123, 999)
-            assert exc_info.value.code == 404
+            assert exc_info.value.status == 404
+            assert exc_info.value.url == "https://canvas.example.com/api/v1/courses/123/assignments/999/"
+            assert exc_info.value.body == "Not Found"
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_get_assignment_api_failure(self, mock_get):
         """Test get_assignment when API returns error"""
-        mock_response = MagicMock()
-        mock_response.ok = False
-        mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response(None, ok=False, status_code=500, text="Internal Server Error")
 
-        with patch.dict(
-            os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
-        ):
+        with patch.dict(os.environ, ENV):
             canvas = CanvasLMS()
-            with pytest.raises(SystemExit) as exc_info:
+            with pytest.raises(CanvasAPIError, match="500"):
                 canvas.get_assignment(123, 456)
-            assert exc_info.value.code == 500
+
+
+class TestCanvasLMSPagination:
+    """Test Link-header pagination"""
+
+    BASE = "https://canvas.example.com/api/v1/courses/123/users"
+
+    @patch("edutools.canvas._session.get")
+    def test_follows_next_links(self, mock_get):
+        """Test pages are followed via rel="next" when no last page is given"""
+        mock_get.side_effect = [
+            _mock_response([{"id": 1}], link=f'<{self.BASE}?page=bookmark:abc>; rel="next"'),
+            _mock_response([{"id": 2}], link=f'<{self.BASE}?page=bookmark:def>; rel="next"'),
+            _mock_response([{"id": 3}]),
+        ]
+
+        with patch.dict(os.environ, ENV):
+            students = CanvasLMS().get_students(123)
+
+        assert [s["id"] for s in students] == [1, 2, 3]
+        assert mock_get.call_count == 3
+        assert mock_get.call_args_list[1][0][0] == f"{self.BASE}?page=bookmark:abc"
+        assert mock_get.call_args_list[1][1]["params"] == {}
+
+    @patch("edutools.canvas._session.get")
+    def test_fetches_numbered_pages_concurrently(self, mock_get):
+        """Test pages 2..N are requested up front when rel="last" is numbered"""
+        first = _mock_response(
+            [{"id": 1}],
+            link=(
+                f'<{self.BASE}?enrollment_type%5B%5D=student&page=2&per_page=100>; rel="next", '
+                f'<{self.BASE}?enrollment_type%5B%5D=student&page=3&per_page=100>; rel="last"'
+            ),
+        )
+        pages = {
+            f"{self.BASE}?enrollment_type%5B%5D=student&page=2&per_page=100": _mock_response([{"id": 2}]),
+            f"{self.BASE}?enrollment_type%5B%5D=student&page=3&per_page=100": _mock_response([{"id": 3}]),
+        }
+
+        def fake_get(url, **kwargs):
+            return pages.get(url, first)
+
+        mock_get.side_effect = fake_get
+
+        with patch.dict(os.environ, ENV):
+            students = CanvasLMS().get_students(123)
+
+        assert [s["id"] for s in students] == [1, 2, 3]
+        assert mock_get.call_count == 3
+
+    @patch("edutools.canvas._session.get")
+    def test_page_error_raises(self, mock_get):
+        """Test a failing later page surfaces as an error"""
+        mock_get.side_effect = [
+            _mock_response([{"id": 1}], link=f'<{self.BASE}?page=2&per_page=100>; rel="last"'),
+            _mock_response(None, ok=False, status_code=500, text="boom"),
+        ]
+
+        with patch.dict(os.environ, ENV), pytest.raises(CanvasAPIError, match="500"):
+            CanvasLMS().get_students(123)
 
 
 class TestCanvasLMSHeaders:
     """Test that authorization headers are properly set"""
 
-    @patch("edutools.canvas.requests.get")
+    @patch("edutools.canvas._session.get")
     def test_headers_sent_with_requests(self, mock_get):
         """Test that authorization headers are sent with API requests"""
-        mock_response = MagicMock()
-        mock_response.ok = True
-        mock_response.text = "[]"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _mock_response([])
 
         with patch.dict(
             os.environ,
-            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "secret_token_xyz"},
+            {"CANVAS_ENDPOINT": "https://canvas.example.com", "CANVAS_TOKEN": "secret_token_xyz"},
         ):
             canvas = CanvasLMS()
             canvas.get_courses()
@@ -391,3 +400,294 @@ class TestCanvasLMSHeaders:
             call_args = mock_get.call_args
             assert "headers" in call_args[1]
             assert call_args[1]["headers"]["Authorization"] == "Bearer secret_token_xyz"
+
+
+class TestCanvasLMSRateLimit:
+    """Test handling of Canvas's per-token rate limit"""
+
+    @patch("edutools.canvas.time.sleep")
+    @patch("edutools.canvas._session.get")
+    def test_throttled_request_is_retried(self, mock_get, mock_sleep):
+        """Test a 403 Rate Limit Exceeded is retried after a backoff"""
+        mock_get.side_effect = [
+            _mock_response(None, ok=False, status_code=403, text="403 Forbidden (Rate Limit Exceeded)"),
+            _mock_response({"id": 456}),
+        ]
+
+        with patch.dict(os.environ, ENV):
+            assignment = CanvasLMS().get_assignment(123, 456)
+
+        assert assignment == {"id": 456}
+        assert mock_get.call_count == 2
+        mock_sleep.assert_called_once()
+
+    @patch("edutools.canvas.time.sleep")
+    @patch("edutools.canvas._session.get")
+    def test_other_403_is_not_retried(self, mock_get, mock_sleep):
+        """Test an ordinary 403 surfaces immediately"""
+        mock_get.return_value = _mock_response(None, ok=False, status_code=403, text="unauthorized")
+
+        with patch.dict(os.environ, ENV), pytest.raises(CanvasAPIError):
+            CanvasLMS().get_assignment(123, 456)
+
+        mock_get.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch("edutools.canvas.time.sleep")
+    @patch("edutools.canvas._session.get")
+    def test_low_remaining_budget_slows_down(self, mock_get, mock_sleep):
+        """Test a nearly drained budget pauses before the next call"""
+        response = _mock_response({"id": 456})
+        response.headers = {"X-Rate-Limit-Remaining": "42.5"}
+        mock_get.return_value = response
+
+        with patch.dict(os.environ, ENV):
+            CanvasLMS().get_assignment(123, 456)
+
+        mock_sleep.assert_called_once_with(0.5)
+
+
+class TestCanvasLMSCache:
+    """Test that identical GETs are only sent once per client"""
+
+    @patch("edutools.canvas._session.get")
+    def test_repeated_get_is_cached(self, mock_get):
+        """Test the same resource is fetched once and then served from cache"""
+        mock_get.return_value = _mock_response({"id": 456, "name": "Final Project"})
+
+        with patch.dict(os.environ, ENV):
+            canvas = CanvasLMS()
+            first = canvas.get_assignment(123, 456)
+            second = canvas.get_assignment(123, 456)
+
+        assert first == second
+        mock_get.assert_called_once()
+
+    @patch("edutools.canvas._session.get")
+    def test_different_params_not_shared(self, mock_get):
+        """Test different query params are cached separately"""
+        mock_get.return_value = _mock_response([])
+
+        with patch.dict(os.environ, ENV):
+            canvas = CanvasLMS()
+            canvas.get_courses()
+            canvas.get_courses(include_all=True)
+            canvas.get_courses()
+
+        assert mock_get.call_count == 2
+
+    @patch("edutools.canvas._session.get")
+    def test_clear_cache(self, mock_get):
+        """Test clear_cache forces a fresh request"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, ENV):
+            canvas = CanvasLMS()
+            canvas.get_students(123)
+            canvas.clear_cache()
+            canvas.get_students(123)
+
+        assert mock_get.call_count == 2
+
+
+class TestCanvasLMSIterators:
+    """Test the streaming iter_* variants"""
+
+    BASE = "https://canvas.example.com/api/v1/courses/123/users"
+
+    @patch("edutools.canvas._session.get")
+    def test_iter_students_yields_before_later_pages(self, mock_get):
+        """Test items from the first page arrive before the next page is requested"""
+        mock_get.side_effect = [
+            _mock_response([{"id": 1}], link=f'<{self.BASE}?page=bookmark:abc>; rel="next"'),
+            _mock_response([{"id": 2}]),
+        ]
+
+        with patch.dict(os.environ, ENV):
+            students = CanvasLMS().iter_students(123)
+            assert next(students)["id"] == 1
+            assert mock_get.call_count == 1
+            assert [s["id"] for s in students] == [2]
+            assert mock_get.call_count == 2
+
+    @patch("edutools.canvas._session.get")
+    def test_consumed_iterator_populates_cache(self, mock_get):
+        """Test a fully consumed iterator is served from cache afterwards"""
+        mock_get.return_value = _mock_response([{"id": 1}, {"id": 2}])
+
+        with patch.dict(os.environ, ENV):
+            canvas = CanvasLMS()
+            assert [s["id"] for s in canvas.iter_students(123)] == [1, 2]
+            assert [s["id"] for s in canvas.get_students(123)] == [1, 2]
+
+        mock_get.assert_called_once()
+
+    @patch("edutools.canvas._session.get")
+    def test_iter_submissions(self, mock_get):
+        """Test submissions stream from the submissions endpoint"""
+        mock_get.return_value = _mock_response([{"id": 1, "user_id": 7}])
+
+        with patch.dict(os.environ, ENV):
+            submissions = list(CanvasLMS().iter_submissions(123, 456))
+
+        assert submissions == [{"id": 1, "user_id": 7}]
+        assert mock_get.call_args[0][0].endswith("/courses/123/assignments/456/submissions")
+
+
+class TestCanvasLMSGetMany:
+    """Test concurrent multi-endpoint fetching"""
+
+    @patch("edutools.canvas._session.get")
+    def test_get_many_mixed_endpoints(self, mock_get):
+        """Test listings and single resources are returned in spec order"""
+        def fake_get(url, **kwargs):
+            if url.endswith("/submissions"):
+                return _mock_response([{"id": 1}, {"id": 2}])
+            return _mock_response({"id": 456, "name": "Final Project"})
+
+        mock_get.side_effect = fake_get
+
+        with patch.dict(os.environ, ENV):
+            assignment, submissions = CanvasLMS().get_many([
+                ("/api/v1/courses/123/assignments/456/", {}),
+                ("/api/v1/courses/123/assignments/456/submissions", {}),
+            ])
+
+        assert assignment["name"] == "Final Project"
+        assert [s["id"] for s in submissions] == [1, 2]
+
+    @patch("edutools.canvas._session.get")
+    def test_get_many_duplicates_share_one_request(self, mock_get):
+        """Test identical concurrent specs are coalesced into one request"""
+        def slow_get(url, **kwargs):
+            time.sleep(0.05)
+            return _mock_response({"id": 456})
+
+        mock_get.side_effect = slow_get
+        spec = ("/api/v1/courses/123/assignments/456/", {})
+
+        with patch.dict(os.environ, ENV):
+            results = CanvasLMS().get_many([spec] * 5)
+
+        assert results == [{"id": 456}] * 5
+        mock_get.assert_called_once()
+
+    @patch("edutools.canvas._session.get")
+    def test_get_many_empty(self, mock_get):
+        """Test an empty spec list makes no requests"""
+        with patch.dict(os.environ, ENV):
+            assert CanvasLMS().get_many([]) == []
+        mock_get.assert_not_called()
+
+
+class TestCanvasLMSDiskCache:
+    """Test the on-disk TTL cache shared across runs"""
+
+    @patch("edutools.canvas._session.get")
+    def test_second_client_reads_from_disk(self, mock_get):
+        """Test a new client is served from disk without a request"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, ENV):
+            CanvasLMS(disk_cache=True).get_students(123)
+            students = CanvasLMS(disk_cache=True).get_students(123)
+
+        assert students == [{"id": 1}]
+        mock_get.assert_called_once()
+
+    @patch("edutools.canvas._session.get")
+    def test_expired_entry_is_refetched(self, mock_get):
+        """Test an entry older than its TTL triggers a fresh request"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, {**ENV, "CANVAS_CACHE_TTL_STUDENTS": "0"}):
+            CanvasLMS(disk_cache=True).get_students(123)
+            CanvasLMS(disk_cache=True).get_students(123)
+
+        assert mock_get.call_count == 2
+
+    @patch("edutools.canvas._session.get")
+    def test_no_cache_env_bypasses_disk(self, mock_get):
+        """Test CANVAS_NO_CACHE skips the on-disk cache"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, {**ENV, "CANVAS_NO_CACHE": "1"}):
+            CanvasLMS(disk_cache=True).get_students(123)
+            CanvasLMS(disk_cache=True).get_students(123)
+
+        assert mock_get.call_count == 2
+
+    @patch("edutools.canvas._session.get")
+    def test_endpoint_is_part_of_key(self, mock_get):
+        """Test different Canvas instances never share cache entries"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, ENV):
+            CanvasLMS(disk_cache=True).get_students(123)
+        with patch.dict(os.environ, {**ENV, "CANVAS_ENDPOINT": "https://other.example.com"}):
+            CanvasLMS(disk_cache=True).get_students(123)
+
+        assert mock_get.call_count == 2
+
+    @patch("edutools.canvas._session.get")
+    def test_token_is_part_of_key(self, mock_get):
+        """Test a changed token never reads another user's entries"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, ENV):
+            CanvasLMS(disk_cache=True).get_courses()
+        with patch.dict(os.environ, {**ENV, "CANVAS_TOKEN": "other_token"}):
+            CanvasLMS(disk_cache=True).get_courses()
+
+        assert mock_get.call_count == 2
+
+    @patch("edutools.canvas._session.get")
+    def test_disk_cache_is_opt_in(self, mock_get):
+        """Test the default client never reads or writes the disk cache"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, ENV):
+            CanvasLMS().get_students(123)
+            CanvasLMS().get_students(123)
+
+        assert mock_get.call_count == 2
+        assert clear_disk_cache() == 0
+
+    @patch("edutools.canvas._session.get")
+    def test_cache_files_are_private(self, mock_get):
+        """Test cached rosters are readable only by the owner"""
+        mock_get.return_value = _mock_response([{"id": 1}])
+
+        with patch.dict(os.environ, ENV):
+            CanvasLMS(disk_cache=True).get_students(123)
+
+        files = os.listdir(cache_dir())
+        assert len(files) == 1
+        assert stat.S_IMODE(os.stat(cache_dir()).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(os.path.join(cache_dir(), files[0])).st_mode) == 0o600
+
+    @patch("edutools.canvas._session.get")
+    def test_errors_are_not_cached(self, mock_get):
+        """Test a failed request leaves nothing on disk"""
+        mock_get.return_value = _mock_response(None, ok=False, status_code=500, text="boom")
+
+        with patch.dict(os.environ, ENV), pytest.raises(CanvasAPIError):
+            CanvasLMS(disk_cache=True).get_assignment(123, 456)
+
+        assert clear_disk_cache() == 0
+
+    @patch("edutools.canvas._session.get")
+    def test_expired_entry_revalidated_with_etag(self, mock_get):
+        """Test an expired single resource is revalidated and a 304 reuses it"""
+        fresh = _mock_response({"id": 456, "name": "Final Project"})
+        fresh.headers = {"ETag": '"v1"'}
+        mock_get.side_effect = [fresh, _mock_response(None, status_code=304)]
+
+        with patch.dict(os.environ, ENV):
+            CanvasLMS(disk_cache=True).get_assignment(123, 456)
+            # Jump well past the 10-minute single-assignment TTL.
+            with patch("edutools.canvas.time.time", return_value=time.time() + 3600):
+                assignment = CanvasLMS(disk_cache=True).get_assignment(123, 456)
+
+        assert assignment == {"id": 456, "name": "Final Project"}
+        assert mock_get.call_args[1]["headers"]["If-None-Match"] == '"v1"'
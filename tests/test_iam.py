@@ -153,6 +153,29 @@ class TestIAMProvisionerAttachPolicy:
             UserName="testuser", PolicyName=EC2_POLICY_NAME
         )
 
+    @patch("edutools.iam.boto3.client")
+    @patch("edutools.iam.boto3.session.Session")
+    def test_attach_ec2_policy_ensures_policy_once(self, mock_session, mock_boto_client):
+        """Test repeated attaches don't publish a new policy version each time"""
+        mock_client = MagicMock()
+        mock_session.return_value.client.return_value = mock_client
+
+        mock_sts = MagicMock()
+        mock_sts.get_caller_identity.return_value = {"Account": "123456789012"}
+        mock_boto_client.return_value = mock_sts
+
+        mock_client.get_policy.return_value = {}
+        mock_client.list_policy_versions.return_value = {
+            "Versions": [{"VersionId": "v1", "IsDefaultVersion": True, "CreateDate": "2024-01-01"}]
+        }
+
+        provisioner = IAMProvisioner()
+        assert provisioner.attach_ec2_policy("alice") is True
+        assert provisioner.attach_ec2_policy("bob") is True
+
+        mock_client.create_policy_version.assert_called_once()
+        assert mock_client.attach_user_policy.call_count == 2
+
     @patch("edutools.iam.boto3.client")
     @patch("edutools.iam.boto3.session.Session")
     def test_attach_ec2_policy_failure(self, mock_session, mock_boto_client):
@@ -341,6 +364,8 @@ class TestProvisionStudents:
 
         # Verify EC2 policy was attached for created users
         assert mock_iam.attach_ec2_policy.call_count == 2
+        # The roster must be fetched live, not from the disk cache
+        mock_canvas_cls.assert_called_once_with(disk_cache=False)
 
     @patch("edutools.iam.IAMProvisioner")
     @patch("edutools.iam.CanvasLMS")
@@ -448,6 +473,74 @@ class TestProvisionStudents:
         assert results == []
         mock_iam.create_user.assert_not_called()
 
+    @patch("edutools.iam.IAMProvisioner")
+    @patch("edutools.iam.CanvasLMS")
+    def test_provision_students_with_given_roster(self, mock_canvas_cls, mock_iam_cls):
+        """Test a roster passed in is used without querying Canvas"""
+        mock_iam = MagicMock()
+        mock_iam.create_user.return_value = {
+            "username": "jsmith", "password": "Pass123!", "status": "created", "error": None,
+        }
+        mock_iam_cls.return_value = mock_iam
+
+        results = provision_students("12345", students=[{"id": 1, "email": "jsmith@example.edu"}])
+
+        assert [r["username"] for r in results] == ["jsmith"]
+        mock_canvas_cls.assert_not_called()
+
+    @patch("edutools.iam.IAMProvisioner")
+    @patch("edutools.iam.CanvasLMS")
+    def test_provision_students_keeps_roster_order(self, mock_canvas_cls, mock_iam_cls):
+        """Test concurrent provisioning returns results in roster order"""
+        mock_canvas = MagicMock()
+        mock_canvas.get_students.return_value = [
+            {"id": i, "email": f"student{i}@example.edu"} for i in range(20)
+        ]
+        mock_canvas_cls.return_value = mock_canvas
+
+        mock_iam = MagicMock()
+        mock_iam.create_user.side_effect = lambda username: {
+            "username": username, "password": f"pw-{username}", "status": "created", "error": None,
+        }
+        mock_iam_cls.return_value = mock_iam
+
+        progress = MagicMock()
+        with patch.dict(
+            os.environ,
+            {"CANVAS_ENDPOINT": "https://canvas.example.com/api/v1/courses", "CANVAS_TOKEN": "test_token"},
+        ):
+            results = provision_students("12345", progress_callback=progress, max_workers=4)
+
+        assert [r["username"] for r in results] == [f"student{i}" for i in range(20)]
+        assert all(r["password"] == f"pw-{r['username']}" for r in results)
+        assert mock_iam.attach_ec2_policy.call_count == 20
+        progress.assert_called_with(20, 20, "Provisioning complete!")
+
+    @patch("edutools.iam.IAMProvisioner")
+    @patch("edutools.iam.CanvasLMS")
+    def test_provision_students_one_failure_keeps_others(self, mock_canvas_cls, mock_iam_cls):
+        """Test an exception for one student doesn't discard the other results"""
+        mock_iam = MagicMock()
+
+        def create_user(username):
+            if username == "student2":
+                raise RuntimeError("Throttling")
+            return {"username": username, "password": f"pw-{username}", "status": "created", "error": None}
+
+        mock_iam.create_user.side_effect = create_user
+        mock_iam_cls.return_value = mock_iam
+
+        students = [{"id": i, "email": f"student{i}@example.edu"} for i in range(5)]
+        results = provision_students("12345", students=students, max_workers=4)
+
+        assert [r["username"] for r in results] == [f"student{i}" for i in range(5)]
+        assert results[2]["status"] == "error"
+        assert results[2]["error"] == "Throttling"
+        assert results[2]["email"] == "student2@example.edu"
+        assert [r["password"] for i, r in enumerate(results) if i != 2] == [
+            f"pw-student{i}" for i in (0, 1, 3, 4)
+        ]
+
 
 class TestIAMProvisionerDeleteUser:
     """Test IAM user deletion"""